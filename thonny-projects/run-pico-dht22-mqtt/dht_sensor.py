@@ -4,16 +4,62 @@ DHT22 温湿度传感器模块
 """
 
 import time
+import array
+import micropython
+from micropython import const
 from machine import Pin
 import dht
 
+# 统计计数器在 _stats 数组中的下标
+_STAT_READ = const(0)       # 读取次数
+_STAT_ERROR = const(1)      # 错误次数
+_STAT_ANOMALY = const(2)    # 异常数据总计数
+_STAT_CONSEC = const(3)     # 连续异常数据计数
+
+
+@micropython.native
+def _median5(a, b, c, d, e):
+    """
+    求 5 个数的中位数（手写比较，约 6 次比较，不分配列表）
+    
+    Returns:
+        5 个数中第 3 小的值
+    """
+    # 两两排序: a <= b, c <= d
+    if a > b:
+        a, b = b, a
+    if c > d:
+        c, d = d, c
+    # 两组最小值中较小的那个至多排第 2，不可能是中位数，用 e 替换后重新排序
+    if a < c:
+        a = e
+        if a > b:
+            a, b = b, a
+    else:
+        c = e
+        if c > d:
+            c, d = d, c
+    # 中位数是剩下 4 个数中第 2 小的值
+    if a < c:
+        return b if b < c else c
+    return d if d < a else a
+
 
 class DHT22Sensor:
     """DHT22 温湿度传感器类"""
     
     # 数据平滑处理常量
-    MAX_CHANGE_THRESHOLD = 20.0  # 最大变化阈值（±3）
-    MAX_ANOMALY_COUNT = 3       # 最大异常数据次数
+    MIN_CHANGE_THRESHOLD_T = 0.5  # 温度噪声下限（°C）：偏离平滑值不超过该值一定按噪声平滑
+    MIN_CHANGE_THRESHOLD_H = 1.0  # 湿度噪声下限（%RH）：DHT22 湿度读数的波动比温度大
+    MAX_ANOMALY_COUNT = 3       # 最大连续异常次数，超过后以当前数据重新开始平滑
+    EWMA_ALPHA = 0.5            # 指数加权移动平均（EWMA）的平滑系数（匀速变化时滞后约 (1-α)/α 个样本）
+    ANOMALY_SIGMA = 3.0         # 偏离平滑值超过几倍标准差（不低于噪声下限）视为异常
+    HISTORY_SIZE = 5            # 中位数窗口大小（_median5 固定为 5），中位数用来确认真实变化
+    
+    # 以上阈值的平方，判断时直接比较平方，省去开方
+    _MIN_BAND_SQ_T = MIN_CHANGE_THRESHOLD_T * MIN_CHANGE_THRESHOLD_T
+    _MIN_BAND_SQ_H = MIN_CHANGE_THRESHOLD_H * MIN_CHANGE_THRESHOLD_H
+    _SIGMA_SQ = ANOMALY_SIGMA * ANOMALY_SIGMA
     
     def __init__(self, data_pin, power_pin=None, led_pin=None, logger=None):
         """
@@ -35,41 +81,82 @@ class DHT22Sensor:
             
         pin_t = Pin(data_pin, Pin.OUT)
         self.sensor = dht.DHT22(pin_t)
+        self._data_pin_obj = pin_t  # 数据引脚对象，测量间隙切换为无上拉输入
         self.led = Pin(led_pin, Pin.OUT) if led_pin else None
         self.logger = logger
         
-        # 统计信息
-        self.read_count = 0
-        self.error_count = 0
+        # 统计信息（计数器放在一个 32 位无符号整数数组中，由 viper 方法原地自增，不产生新的 int 对象）
+        self._stats = array.array('I', [0, 0, 0, 0])
         self.last_temperature = None
         self.last_humidity = None
-        self.last_read_time = None
+        self.last_read_time = None            # 上次成功读取时的 time.ticks_ms()
+        self._last_error = None             # 最近一次测量失败的异常
+        
+        # 最近 5 次原始读数的环形缓冲区（求中位数确认真实变化）
+        self._hist_t = [0.0] * self.HISTORY_SIZE
+        self._hist_h = [0.0] * self.HISTORY_SIZE
+        self._hist_i = 0
         
-        # 数据平滑处理
-        self.last_valid_temperature = None  # 上次验证通过的温度
-        self.last_valid_humidity = None     # 上次验证通过的湿度
-        self.consecutive_anomaly_count = 0  # 连续异常数据计数
-        self.anomaly_count = 0              # 异常数据总计数
+        # 数据平滑处理（EWMA 均值和方差）
+        self._ewma_t = None                 # 温度平滑值
+        self._ewma_h = None                 # 湿度平滑值
+        self._var_t = 0.0                   # 温度方差估计
+        self._var_h = 0.0                   # 湿度方差估计
     
-    def _log(self, message, is_error=False):
-        """内部日志方法"""
+    def _log(self, message, *args, is_error=False):
+        """内部日志方法（带 args 时按 % 格式化，由日志器在真正输出时才格式化）"""
         if self.logger:
             if is_error:
-                self.logger.error(message)
+                self.logger.error(message, *args)
             else:
-                self.logger.info(message)
+                self.logger.info(message, *args)
         else:
-            print(message)
+            print(message % args if args else message)
+    
+    @micropython.viper
+    def _incr(self, index: int):
+        """
+        统计计数器原地加 1
+        
+        Args:
+            index: 计数器下标（_STAT_READ / _STAT_ERROR / _STAT_ANOMALY / _STAT_CONSEC）
+        """
+        stats = ptr32(self._stats)
+        stats[index] = stats[index] + 1
+    
+    @property
+    def read_count(self):
+        """读取次数"""
+        return self._stats[_STAT_READ]
+    
+    @property
+    def error_count(self):
+        """错误次数"""
+        return self._stats[_STAT_ERROR]
+    
+    @property
+    def anomaly_count(self):
+        """异常数据总计数"""
+        return self._stats[_STAT_ANOMALY]
     
+    @property
+    def consecutive_anomaly_count(self):
+        """连续异常数据计数"""
+        return self._stats[_STAT_CONSEC]
+    
+    @micropython.native
     def _led_on(self):
-        """LED 指示灯开启"""
-        if self.led:
-            self.led.on()
+        """LED 指示灯开启（read 中已内联，保留给外部调用）"""
+        led = self.led
+        if led:
+            led.on()
     
+    @micropython.native
     def _led_off(self):
-        """LED 指示灯关闭"""
-        if self.led:
-            self.led.off()
+        """LED 指示灯关闭（read 中已内联，保留给外部调用）"""
+        led = self.led
+        if led:
+            led.off()
     
     def read(self, retry_count=3, retry_delay=2, watchdog_feed_callback=None):
         """
@@ -83,82 +170,120 @@ class DHT22Sensor:
         Returns: 
             tuple: (温度, 湿度) 或 None（失败时）
         """
-        self.read_count += 1
+        self._incr(_STAT_READ)
+        
+        # 循环内反复使用的属性先放到局部变量
+        sensor = self.sensor
+        data_pin = self._data_pin_obj
+        led = self.led
         
         for attempt in range(retry_count):
-            try:
-                # 喂狗（如果提供了回调函数）
-                if watchdog_feed_callback:
-                    watchdog_feed_callback()
-                
-                # 关闭 LED 表示正在读取
-                self._led_off()
-                
-                # 读取传感器
-                self.sensor.measure()
-                temperature = self.sensor.temperature()
-                humidity = self.sensor.humidity()
-                
-                # 数据验证
-                if not self._validate_data(temperature, humidity):
-                    raise ValueError(f"数据超出正常范围:  温度={temperature}, 湿度={humidity}")
-                
-                # 数据平滑处理
-                is_valid, smoothed_temp, smoothed_humidity = self._check_data_change(temperature, humidity)
-                
-                # 如果是有效的新数据（不是使用的旧数据），更新last_valid值
-                if is_valid:
-                    self.last_valid_temperature = temperature
-                    self.last_valid_humidity = humidity
-                
-                # 保存最后读取的值（用于上传）
-                self.last_temperature = smoothed_temp
-                self.last_humidity = smoothed_humidity
-                self.last_read_time = time.time()
-                
-                # 开启 LED 表示读取成功
-                self._led_on()
-                
-                self._log(f"读取成功: 温度={smoothed_temp}°C, 湿度={smoothed_humidity}%")
-                
-                return (smoothed_temp, smoothed_humidity)
-                
-            except Exception as e: 
-                self.error_count += 1
-                error_msg = f"读取失败 (尝试 {attempt + 1}/{retry_count}): {type(e).__name__} - {e}"
+            # 喂狗（如果提供了回调函数）
+            if watchdog_feed_callback:
+                watchdog_feed_callback()
+            
+            # 关闭 LED 表示正在读取
+            if led:
+                led.off()
+            
+            # 读取传感器（驱动异常在 _measure_once 内部处理，成功路径上没有 try/except）
+            ok, temperature, humidity = self._measure_once(sensor, data_pin)
+            
+            if ok:
+                # 数据验证（放大 10 倍转为整数，交给 viper 做纯整数比较）
+                if self._validate_data(int(temperature * 10), int(humidity * 10)):
+                    # 数据平滑处理（平滑状态在 _check_data_change 内部更新）
+                    _, smoothed_temp, smoothed_humidity = self._check_data_change(temperature, humidity)
+                    
+                    # 保存最后读取的值（用于上传）
+                    self.last_temperature = smoothed_temp
+                    self.last_humidity = smoothed_humidity
+                    self.last_read_time = time.ticks_ms()
+                    
+                    # 开启 LED 表示读取成功
+                    if led:
+                        led.on()
+                    
+                    # 成功日志每次采样都会触发，日志级别不输出 INFO 时直接跳过
+                    logger = self.logger
+                    if logger is None or logger.is_info():
+                        self._log("读取成功: 温度=%s°C, 湿度=%s%%", smoothed_temp, smoothed_humidity)
+                    
+                    return (smoothed_temp, smoothed_humidity)
                 
-                # 最后一次尝试才记录错误
-                if attempt == retry_count - 1:
-                    self._log(error_msg, is_error=True)
-                    self._led_off()
-                    return None
-                else:
-                    self._log(error_msg)
-                    time.sleep(retry_delay)
+                error = ValueError("数据超出正常范围:  温度=%s, 湿度=%s" % (temperature, humidity))
+            else:
+                error = self._last_error
+            
+            self._incr(_STAT_ERROR)
+            error_fmt = "读取失败 (尝试 %d/%d): %s - %s"
+            
+            # 最后一次尝试才记录错误
+            if attempt == retry_count - 1:
+                self._log(error_fmt, attempt + 1, retry_count, type(error).__name__, error, is_error=True)
+                if led:
+                    led.off()
+                return None
+            else:
+                self._log(error_fmt, attempt + 1, retry_count, type(error).__name__, error)
+                time.sleep(retry_delay)
         
         return None
     
-    def _validate_data(self, temperature, humidity):
+    def _measure_once(self, sensor, data_pin):
+        """
+        执行一次传感器测量，不向外抛出异常
+        
+        内部上拉只在测量期间开启，测量结束后数据引脚切换为无上拉输入（高阻），
+        采样间隔内不再持续消耗上拉电流（模块上一般已有外部 10kΩ 上拉）
+        
+        Args:
+            sensor: dht.DHT22 对象
+            data_pin: 数据引脚 Pin 对象
+            
+        Returns:
+            tuple: 成功返回 (True, 温度, 湿度)，失败返回 (False, None, None)，异常保存在 _last_error 中
+        """
+        data_pin.init(Pin.IN, Pin.PULL_UP)
+        try:
+            sensor.measure()
+            return (True, sensor.temperature(), sensor.humidity())
+        except Exception as e:
+            self._last_error = e
+            return (False, None, None)
+        finally:
+            data_pin.init(Pin.IN, None)
+    
+    @micropython.viper
+    def _validate_data(self, temperature: int, humidity: int) -> int:
         """
         验证传感器数据是否在合理范围内
         
         Args:
-            temperature: 温度值
-            humidity: 湿度值
+            temperature: 温度值（×10 取整）
+            humidity: 湿度值（×10 取整）
             
         Returns:
-            bool: 数据有效返回 True
+            int: 数据有效返回 1，否则返回 0
         """
-        # DHT22 测量范围:  温度 -40~80°C, 湿度 0~100%
-        if temperature < -40 or temperature > 80:
-            return False
-        if humidity < 0 or humidity > 100:
-            return False
-        return True
+        # DHT22 测量范围:  温度 -40~80°C, 湿度 0~100%（单位 0.1）
+        if temperature < -400 or temperature > 800:
+            return 0
+        if humidity < 0 or humidity > 1000:
+            return 0
+        return 1
     
+    @micropython.native
     def _check_data_change(self, temperature, humidity):
         """
-        检查数据变化是否超出阈值（数据平滑处理）
+        用指数加权移动平均（EWMA）平滑数据，偏离平滑值超出自适应范围的读数视为异常
+        
+        允许范围为 ANOMALY_SIGMA 倍标准差（不低于各自的噪声下限），温度和湿度分别判断：
+        - 范围内：更新 EWMA 均值和方差
+        - 范围外：视为异常，不更新均值和方差，输出保持当前平滑值（单次毛刺不会影响后续输出）
+        - 范围外且最近 5 次读数的中位数也在同一侧超出范围：多数读数已经到了新值，
+          视为真实变化，平滑值直接跳到当前数据，方差按这次变化更新（范围随之变宽）
+        连续异常超过 MAX_ANOMALY_COUNT 次时以当前数据重新开始平滑。
         
         Args:
             temperature: 当前温度值
@@ -166,52 +291,123 @@ class DHT22Sensor:
             
         Returns:
             tuple: (is_valid, smoothed_temperature, smoothed_humidity)
-                   is_valid: 数据是否有效
+                   is_valid: 当前数据是否有效（未被当作异常丢弃）
                    smoothed_temperature: 平滑处理后的温度
                    smoothed_humidity: 平滑处理后的湿度
         """
-        # 如果是第一次读取，直接返回当前数据
-        if self.last_valid_temperature is None or self.last_valid_humidity is None:
+        # 热路径上的属性先放到局部变量，native 代码读局部变量更快
+        ewma_t = self._ewma_t
+        ewma_h = self._ewma_h
+        hist_t = self._hist_t
+        hist_h = self._hist_h
+        
+        # 如果是第一次读取，以当前数据填满历史并作为初始平滑值
+        if ewma_t is None or ewma_h is None:
+            for i in range(self.HISTORY_SIZE):
+                hist_t[i] = temperature
+                hist_h[i] = humidity
+            self._reset_smoothing(temperature, humidity)
             return (True, temperature, humidity)
         
-        # 计算温度和湿度的变化量
-        temp_change = abs(temperature - self.last_valid_temperature)
-        humidity_change = abs(humidity - self.last_valid_humidity)
+        # 写入环形缓冲区并求最近 5 次读数的中位数（只用来确认真实变化，不直接作为输出）
+        i = self._hist_i
+        hist_t[i] = temperature
+        hist_h[i] = humidity
+        i += 1
+        self._hist_i = 0 if i >= self.HISTORY_SIZE else i
+        median_t = _median5(hist_t[0], hist_t[1], hist_t[2], hist_t[3], hist_t[4]) - ewma_t
+        median_h = _median5(hist_h[0], hist_h[1], hist_h[2], hist_h[3], hist_h[4]) - ewma_h
+        
+        var_t = self._var_t
+        var_h = self._var_h
+        
+        # 计算当前数据相对平滑值的偏离量
+        temp_delta = temperature - ewma_t
+        humidity_delta = humidity - ewma_h
+        
+        temp_sq = temp_delta * temp_delta
+        humidity_sq = humidity_delta * humidity_delta
         
-        # 检查是否超出阈值
-        is_anomaly = (temp_change > self.MAX_CHANGE_THRESHOLD or 
-                     humidity_change > self.MAX_CHANGE_THRESHOLD)
+        # 允许范围（平方）：ANOMALY_SIGMA 倍标准差，不低于噪声下限
+        sigma_sq = DHT22Sensor._SIGMA_SQ
+        band_t = sigma_sq * var_t
+        if band_t < DHT22Sensor._MIN_BAND_SQ_T:
+            band_t = DHT22Sensor._MIN_BAND_SQ_T
+        band_h = sigma_sq * var_h
+        if band_h < DHT22Sensor._MIN_BAND_SQ_H:
+            band_h = DHT22Sensor._MIN_BAND_SQ_H
         
-        if is_anomaly:
+        # 范围外的读数：中位数在同一侧也超出范围时是真实变化，否则是异常
+        alpha = DHT22Sensor.EWMA_ALPHA
+        anomaly_t = False
+        if temp_sq > band_t:
+            if median_t * temp_delta > 0 and median_t * median_t > band_t:
+                ewma_t = temperature
+                self._var_t = (1 - alpha) * (var_t + alpha * temp_sq)
+            else:
+                anomaly_t = True
+        else:
+            # 噪声范围内做 EWMA 平滑：ewma = ewma + α·δ，var = (1-α)(var + α·δ²)
+            ewma_t += alpha * temp_delta
+            self._var_t = (1 - alpha) * (var_t + alpha * temp_sq)
+        
+        anomaly_h = False
+        if humidity_sq > band_h:
+            if median_h * humidity_delta > 0 and median_h * median_h > band_h:
+                ewma_h = humidity
+                self._var_h = (1 - alpha) * (var_h + alpha * humidity_sq)
+            else:
+                anomaly_h = True
+        else:
+            ewma_h += alpha * humidity_delta
+            self._var_h = (1 - alpha) * (var_h + alpha * humidity_sq)
+        
+        self._ewma_t = ewma_t
+        self._ewma_h = ewma_h
+        
+        stats = self._stats
+        
+        if anomaly_t or anomaly_h:
             # 异常数据计数增加
-            self.consecutive_anomaly_count += 1
-            self.anomaly_count += 1
+            self._incr(_STAT_CONSEC)
+            self._incr(_STAT_ANOMALY)
+            consecutive_anomaly_count = stats[_STAT_CONSEC]
             
+            # 只有在异常分支才需要变化量的绝对值（用于日志）
             self._log(
-                f"检测到异常数据: 温度变化={temp_change:.1f}°C, 湿度变化={humidity_change:.1f}%, 连续异常次数={self.consecutive_anomaly_count}",
-                is_error=False
+                "检测到异常数据: 温度变化=%.1f°C, 湿度变化=%.1f%%, 连续异常次数=%d",
+                abs(temp_delta), abs(humidity_delta), consecutive_anomaly_count
             )
             
-            # 如果连续异常次数超过阈值，使用当前异常数据
-            if self.consecutive_anomaly_count > self.MAX_ANOMALY_COUNT:
+            # 如果连续异常次数超过阈值，使用当前异常数据重新开始平滑
+            if consecutive_anomaly_count > self.MAX_ANOMALY_COUNT:
                 self._log(
-                    f"连续异常数据超过{self.MAX_ANOMALY_COUNT}次，采用当前数据: 温度={temperature}°C, 湿度={humidity}%"
+                    "连续异常数据超过%d次，采用当前数据: 温度=%s°C, 湿度=%s%%",
+                    self.MAX_ANOMALY_COUNT, temperature, humidity
                 )
                 # 重置连续异常计数
-                self.consecutive_anomaly_count = 0
+                stats[_STAT_CONSEC] = 0
+                self._reset_smoothing(temperature, humidity)
                 return (True, temperature, humidity)
-            else:
-                # 使用上次的有效数据
-                self._log(
-                    f"丢弃异常数据，使用上次有效数据: 温度={self.last_valid_temperature}°C, 湿度={self.last_valid_humidity}%"
-                )
-                return (False, self.last_valid_temperature, self.last_valid_humidity)
-        else:
-            # 数据正常，重置连续异常计数
-            if self.consecutive_anomaly_count > 0:
-                self._log(f"数据恢复正常，重置异常计数")
-            self.consecutive_anomaly_count = 0
-            return (True, temperature, humidity)
+            
+            # 丢弃异常数据，异常的一项保持原平滑值（另一项正常时照常更新）
+            smoothed_t = round(ewma_t, 1)
+            smoothed_h = round(ewma_h, 1)
+            self._log("丢弃异常数据，使用平滑值: 温度=%s°C, 湿度=%s%%", smoothed_t, smoothed_h)
+            return (False, smoothed_t, smoothed_h)
+        
+        # 数据正常，重置连续异常计数
+        if stats[_STAT_CONSEC] > 0:
+            self._log("数据恢复正常，重置异常计数")
+            stats[_STAT_CONSEC] = 0
+        return (True, round(ewma_t, 1), round(ewma_h, 1))
+    
+    def _reset_smoothing(self, temperature, humidity):
+        """以给定数据重新开始平滑"""
+        self._ewma_t = temperature
+        self._ewma_h = humidity
+        self._var_t = 0.0
+        self._var_h = 0.0
     
     def read_fahrenheit(self, retry_count=3, retry_delay=2):
         """
@@ -236,13 +432,14 @@ class DHT22Sensor:
         获取上次成功读取的数据
         
         Returns: 
-            dict: 包含温度、湿度、时间的字典，如果没有则返回 None
+            dict: 包含温度、湿度、读取时刻（ticks_ms）和距今秒数的字典，如果没有则返回 None
         """
         if self.last_temperature is not None:
             return {
                 'temperature': self.last_temperature,
                 'humidity': self.last_humidity,
-                'timestamp': self.last_read_time
+                'ticks_ms': self.last_read_time,
+                'age_seconds': time.ticks_diff(time.ticks_ms(), self.last_read_time) // 1000
             }
         return None
     
@@ -253,23 +450,24 @@ class DHT22Sensor:
         Returns:
             dict: 读取次数、错误次数、成功率、异常数据统计
         """
-        success_count = self.read_count - self.error_count
-        success_rate = (success_count / self.read_count * 100) if self.read_count > 0 else 0
+        # 一次性读出计数器，只在需要时才构造字典
+        read_count, error_count, anomaly_count, consecutive_anomaly_count = self._stats
+        success_count = read_count - error_count
+        success_rate = (success_count / read_count * 100) if read_count > 0 else 0
         
         return {
-            'total_reads': self.read_count,
-            'errors': self.error_count,
+            'total_reads': read_count,
+            'errors': error_count,
             'success_rate': f"{success_rate:.1f}%",
-            'anomaly_count': self.anomaly_count,
-            'consecutive_anomaly': self.consecutive_anomaly_count
+            'anomaly_count': anomaly_count,
+            'consecutive_anomaly': consecutive_anomaly_count
         }
     
     def reset_statistics(self):
         """重置统计信息"""
-        self.read_count = 0
-        self.error_count = 0
-        self.anomaly_count = 0
-        self.consecutive_anomaly_count = 0
+        stats = self._stats
+        for i in range(len(stats)):
+            stats[i] = 0
     
     def cleanup(self):
         """
@@ -309,6 +507,7 @@ class DHT22Sensor:
             pin_t = Pin(self.data_pin)
             # 4. 重新创建传感器对象
             self.sensor = dht.DHT22(pin_t)
+            self._data_pin_obj = pin_t
             print("DHT22 软件断电复位完成")
             
 
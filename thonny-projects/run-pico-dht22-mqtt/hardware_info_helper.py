@@ -5,56 +5,121 @@ import ubinascii
 import time
 import gc
 
+# 复位原因映射：上报用代码，打印用说明
+_RESET_MAP = {machine.PWRON_RESET: 0, machine.WDT_RESET: 1}
+_RESET_NAMES = {machine.PWRON_RESET: "上电复位", machine.WDT_RESET: "看门狗复位"}
+
+# 运行期间不会变化的设备信息，第一次读取后缓存
+_unique_id = None
+_static_info = None
+
+def get_unique_id():
+    """获取设备唯一 ID 的十六进制字符串（只转换一次，之后复用同一个字符串）"""
+    global _unique_id
+    if _unique_id is None:
+        _unique_id = ubinascii.hexlify(machine.unique_id()).decode()
+    return _unique_id
+
+# 片内温度传感器（ADC4），模块加载时创建一次
+_ADC4 = machine.ADC(4)
+_ADC_SCALE = 3.3 / 65535        # 原始读数转电压
+_TEMP_SLOPE_INV = 1 / 0.001721  # 温度传感器斜率的倒数（乘法代替除法，Pico 没有 FPU）
+
 def get_cpu_temperature():
-    sensor = machine.ADC(4)
-    voltage = sensor.read_u16() * (3.3 / 65535)
-    temperature = 27 - (voltage - 0.706) / 0.001721
+    voltage = _ADC4.read_u16() * _ADC_SCALE
+    temperature = 27 - (voltage - 0.706) * _TEMP_SLOPE_INV
     return temperature
 
+# 垃圾回收节流：距上次回收不足 _GC_MIN_INTERVAL_MS 且剩余内存充足时跳过
+_GC_MIN_INTERVAL_MS = 5000
+_GC_LOW_MEM_BYTES = 8192
+_last_gc_ms = None
+
+def _maybe_collect():
+    """
+    按需执行垃圾回收（读取内存信息前调用）
+
+    需要强制回收时请直接调用 gc.collect()
+    """
+    global _last_gc_ms
+    now = time.ticks_ms()
+    if (_last_gc_ms is None or time.ticks_diff(now, _last_gc_ms) > _GC_MIN_INTERVAL_MS
+            or gc.mem_free() < _GC_LOW_MEM_BYTES):
+        gc.collect()
+        _last_gc_ms = now
+
+# get_memory_info 复用的字典（原地更新，不在每次调用时分配新字典）
+_memory_info = {"total": 0, "used": 0, "free": 0, "usage_percent": 0}
+
 def get_memory_info():
-    gc.collect()
+    """
+    获取内存信息
+
+    Returns:
+        dict: total/used/free/usage_percent，每次调用都会原地更新并返回同一个字典
+    """
+    _maybe_collect()
     mem_free = gc.mem_free()
     mem_alloc = gc.mem_alloc()
     mem_total = mem_free + mem_alloc
-    return {
-        "total": mem_total,
-        "used": mem_alloc,
-        "free": mem_free,
-        "usage_percent": round((mem_alloc / mem_total * 100) if mem_total else 0, 2)
-    }
+    info = _memory_info
+    info["total"] = mem_total
+    info["used"] = mem_alloc
+    info["free"] = mem_free
+    info["usage_percent"] = round((mem_alloc / mem_total * 100) if mem_total else 0, 2)
+    return info
 
-def get_device_info_all():
-    all_info = {}
+def get_device_info_static():
+    """
+    获取运行期间不会变化的设备信息（第一次调用时读取并缓存）
+
+    Returns:
+        dict: 缓存的设备信息，调用方需要修改时请先复制
+    """
+    global _static_info
+    if _static_info is not None:
+        return _static_info
+
+    static_info = {}
 
-    all_info['unique_id'] = ubinascii.hexlify(machine.unique_id()).decode()
+    static_info['unique_id'] = get_unique_id()
 
-    all_info['platform'] = sys.platform
-    all_info['os_version'] = sys.version
-    all_info['cpu_frequency_mhz'] = machine.freq() // 1_000_000
-    all_info['cpu_temperature'] = round(get_cpu_temperature(), 2)
+    static_info['platform'] = sys.platform
+    static_info['os_version'] = sys.version
+    static_info['cpu_frequency_mhz'] = machine.freq() // 1_000_000
+
+    static_info['reset_reason'] = _RESET_MAP.get(machine.reset_cause(), 9)
+    _static_info = static_info
+    return static_info
+
+def get_device_info_dynamic():
+    """获取每次上报都需要刷新的设备信息（温度、存储、内存、运行时间）"""
+    dynamic_info = {}
+
+    dynamic_info['cpu_temperature'] = round(get_cpu_temperature(), 2)
 
     stat = os.statvfs('/')
-    all_info['total_storage_bytes'] = stat[0] * stat[2]
-    all_info['used_storage_bytes'] = all_info['total_storage_bytes'] - (stat[0] * stat[3])
-    all_info['free_storage_bytes'] = stat[0] * stat[3]
-    all_info['storage_usage_percent'] = round((all_info['used_storage_bytes'] / all_info['total_storage_bytes']) * 100, 1)
+    dynamic_info['total_storage_bytes'] = stat[0] * stat[2]
+    dynamic_info['used_storage_bytes'] = dynamic_info['total_storage_bytes'] - (stat[0] * stat[3])
+    dynamic_info['free_storage_bytes'] = stat[0] * stat[3]
+    dynamic_info['storage_usage_percent'] = round((dynamic_info['used_storage_bytes'] / dynamic_info['total_storage_bytes']) * 100, 1)
 
-    memory_info = get_memory_info()
-    all_info['total_memory_bytes'] = memory_info['total']
-    all_info['used_memory_bytes'] = memory_info['used']
-    all_info['free_memory_bytes'] = memory_info['free']
-    all_info['memory_usage_percent'] = memory_info['usage_percent']
+    # 内存信息直接写入结果字典，不经过 get_memory_info 的中间字典
+    _maybe_collect()
+    mem_free = gc.mem_free()
+    mem_alloc = gc.mem_alloc()
+    mem_total = mem_free + mem_alloc
+    dynamic_info['total_memory_bytes'] = mem_total
+    dynamic_info['used_memory_bytes'] = mem_alloc
+    dynamic_info['free_memory_bytes'] = mem_free
+    dynamic_info['memory_usage_percent'] = round((mem_alloc / mem_total * 100) if mem_total else 0, 2)
 
-    all_info['uptime_seconds'] = time.ticks_ms() // 1000
+    dynamic_info['uptime_seconds'] = time.ticks_ms() // 1000
+    return dynamic_info
 
-    reset_cause = machine.reset_cause()
-    if reset_cause == machine.PWRON_RESET:
-        cause_str = 0
-    elif reset_cause == machine.WDT_RESET:
-        cause_str = 1
-    else:
-        cause_str = 9
-    all_info['reset_reason'] = cause_str
+def get_device_info_all():
+    all_info = dict(get_device_info_static())
+    all_info.update(get_device_info_dynamic())
     return all_info
 
 def print_memory_info():
@@ -84,8 +149,7 @@ def print_hardware_info():
 
     # 设备 ID
     print("\n【设备标识】")
-    unique_id = ubinascii.hexlify(machine.unique_id()).decode()
-    print(f"唯一 ID: {unique_id}")
+    print(f"唯一 ID: {get_unique_id()}")
     
     # 温度
     print("\n【传感器】")
@@ -101,12 +165,7 @@ def print_hardware_info():
     
     print("\n【电源】")
     reset_cause = machine.reset_cause()
-    if reset_cause == machine.PWRON_RESET:
-        cause_str = "上电复位"
-    elif reset_cause == machine.WDT_RESET:
-        cause_str = "看门狗复位"
-    else:
-        cause_str = f"其他 (代码: {reset_cause})"
+    cause_str = _RESET_NAMES.get(reset_cause) or f"其他 (代码: {reset_cause})"
     print(f"复位原因: {cause_str}")
     
     # 运行时间
@@ -3,24 +3,31 @@
 适用于 Raspberry Pi Pico 等资源受限设备
 """
 
+import os
 import time
+from micropython import const
+
+# 日志级别（const 在编译时直接替换为立即数）
+_DEBUG = const(0)
+_INFO = const(1)
+_WARNING = const(2)
+_ERROR = const(3)
+
+# 级别名称，按级别数值索引（元组下标访问，不需要哈希查找）
+_LEVEL_NAMES = ("DEBUG", "INFO", "WARN", "ERROR")
+_LEVEL_TAGS = ("[DEBUG]", "[INFO]", "[WARN]", "[ERROR]")
 
 
 class SimpleLogger:
     """简单日志记录器"""
     
     # 日志级别
-    DEBUG = 0
-    INFO = 1
-    WARNING = 2
-    ERROR = 3
+    DEBUG = _DEBUG
+    INFO = _INFO
+    WARNING = _WARNING
+    ERROR = _ERROR
     
-    LEVEL_NAMES = {
-        DEBUG: "DEBUG",
-        INFO:  "INFO",
-        WARNING: "WARN",
-        ERROR: "ERROR"
-    }
+    LEVEL_NAMES = _LEVEL_NAMES
     
     def __init__(self, filename, max_size=10240, level=INFO, use_timestamp=True, keep_ratio=0.5):
         """
@@ -38,52 +45,68 @@ class SimpleLogger:
         self.level = level
         self.use_timestamp = use_timestamp
         self.keep_ratio = max(0.1, min(0.9, keep_ratio))  # 限制在 0.1-0.9 之间
+        self._ts_fmt = "[{:02d}-{:02d} {:02d}:{:02d}:{:02d}]"  # 时间戳模板 [MM-DD HH:MM:SS]
+        # 整行日志模板：[时间戳] [级别] 消息，一次 format 生成
+        self._line_fmt = (self._ts_fmt + " {} {}\n") if use_timestamp else "{} {}\n"
         self.file = None
+        
+        # 写入缓冲区：攒够 _buf_limit 字节或遇到 ERROR 日志才写入并 flush，减少 Flash 写入次数
+        self._buf = bytearray()
+        self._buf_limit = 512
+        self._written = 0  # 日志文件当前大小（含缓冲区中未写入的部分），避免每条日志都 os.stat
+        
         self._open_file()
     
+    def _file_size(self):
+        """获取日志文件大小，文件不存在返回 0"""
+        try:
+            return os.stat(self.filename)[6]
+        except OSError:
+            return 0
+    
     def _open_file(self):
-        """打开日志文件"""
+        """打开日志文件（追加模式，文件不存在时自动创建）"""
         try:
-            # 检查文件大小
-            try:
-                import os
-                file_size = os.stat(self.filename)[6]
-                
-                # 如果文件过大，删除最旧的日志
-                if file_size > self.max_size:
-                    self._trim_old_logs()
-                    self.file = open(self.filename, "a")
-                else:
-                    self.file = open(self.filename, "a")
-            except OSError:
-                # 文件不存在，创建新文件
-                self.file = open(self.filename, "w")
+            # 如果文件过大，先删除最旧的日志
+            if self._file_size() > self.max_size:
+                self._trim_old_logs()
+            
+            self.file = open(self.filename, "ab")
+            self._written = self._file_size()
                 
         except Exception as e:
             print(f"无法打开日志文件:  {e}")
             self.file = None
     
     def _trim_old_logs(self):
-        """删除最旧的日志，保留较新的日志"""
+        """删除最旧的日志，保留较新的日志（分块流式复制，内存占用固定，不整体读入文件）"""
         try:
-            # 读取所有日志行
-            with open(self.filename, "r") as f:
-                lines = f.readlines()
-            
-            # 计算要保留的行数
-            total_lines = len(lines)
-            keep_lines = int(total_lines * self.keep_ratio)
+            file_size = os.stat(self.filename)[6]
+            tmp_filename = self.filename + ".tmp"
             
-            if keep_lines < total_lines:
-                # 只保留较新的日志
-                kept_lines = lines[-keep_lines:] if keep_lines > 0 else []
+            # 从要保留部分的起点开始读，丢弃半行对齐到行首
+            with open(self.filename, "rb") as src:
+                src.seek(int(file_size * (1 - self.keep_ratio)))
+                src.readline()
                 
-                # 重写文件
-                with open(self.filename, "w") as f:
-                    f.write("=== 日志文件已修剪（删除最旧的日志） ===\n")
-                    f.write(kept_lines)
-                
-                print(f"日志已修剪：保留 {len(kept_lines)}/{total_lines} 行")
+                # 分块复制到临时文件
+                buf = bytearray(512)
+                mv = memoryview(buf)
+                kept_size = 0
+                with open(tmp_filename, "wb") as dst:
+                    dst.write("=== 日志文件已修剪（删除最旧的日志） ===\n".encode())
+                    while True:
+                        n = src.readinto(buf)
+                        if not n:
+                            break
+                        dst.write(mv[:n])
+                        kept_size += n
+            
+            # 用临时文件替换原文件
+            os.remove(self.filename)
+            os.rename(tmp_filename, self.filename)
+            
+            print(f"日志已修剪：保留 {kept_size}/{file_size} 字节")
         except Exception as e:
             print(f"修剪日志失败: {e}")
             # 如果修剪失败，清空文件
@@ -93,92 +116,121 @@ class SimpleLogger:
             except:
                 pass
     
-    def _write_raw(self, message):
-        """直接写入消息到文件"""
+    def _write_raw(self, message, flush=False):
+        """
+        写入消息到缓冲区，缓冲区满或 flush 为 True 时写入文件
+        
+        Args:
+            message: 日志消息
+            flush: 是否立即写入文件（ERROR 日志）
+        """
         if self.file:
+            data = message.encode()
+            self._buf += data
+            self._written += len(data)
+            if flush or len(self._buf) >= self._buf_limit:
+                self.sync()
+    
+    def sync(self):
+        """把缓冲区中的日志写入文件"""
+        if self.file and self._buf:
             try:
-                self.file.write(message)
+                self.file.write(self._buf)
                 self.file.flush()
             except Exception as e:
                 print(f"写入日志失败: {e}")
-    
-    def _get_timestamp(self):
-        """获取简单的时间戳"""
-        if not self.use_timestamp:
-            return ""
-        
-        try:
-            t = time.localtime()
-            return "{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(
-                t[1], t[2], t[3], t[4], t[5]  # MM-DD HH:MM:SS
-            )
-        except:
-            return ""
+            self._buf = bytearray()
     
     def _check_and_trim(self):
-        """检查文件大小，如果超过限制则修剪"""
-        if not self.file:
+        """检查文件大小（按已写入字节数计算，不查询文件系统），如果超过限制则修剪"""
+        if not self.file or self._written <= self.max_size:
             return
         
         try:
-            import os
-            file_size = os.stat(self.filename)[6]
-            
-            if file_size > self.max_size:
-                # 关闭当前文件
-                self.file.close()
-                # 修剪日志
-                self._trim_old_logs()
-                # 重新打开文件
-                self.file = open(self.filename, "a")
+            # 写入缓冲区并关闭当前文件
+            self.sync()
+            self.file.close()
+            # 修剪日志
+            self._trim_old_logs()
+            # 重新打开文件
+            self.file = open(self.filename, "ab")
+            self._written = self._file_size()
         except Exception as e:
             print(f"检查文件大小失败: {e}")
     
-    def _log(self, level, message):
-        """内部日志方法"""
+    def _log(self, level, message, args=()):
+        """
+        内部日志方法
+        
+        Args:
+            level: 日志级别
+            message: 日志消息，带 args 时作为 % 格式化模板
+            args: 格式化参数，只有在日志需要输出时才进行格式化
+        """
+        # 级别检查放在最前面，被过滤的日志不做修剪检查、时间戳和格式化
         if level < self.level:
             return
         
         # 检查文件大小，如果需要则修剪
         self._check_and_trim()
         
-        # 构建日志消息
-        parts = []
-        
-        # 添加时间戳
-        timestamp = self._get_timestamp()
-        if timestamp:
-            parts. append(f"[{timestamp}]")
+        # 添加消息（延迟到这里才格式化）
+        if args:
+            message = message % args
         
-        # 添加级别
-        parts.append(f"[{self.LEVEL_NAMES[level]}]")
+        # 构建日志行（时间戳、级别和消息一次 format 完成）
+        if self.use_timestamp:
+            t = time.localtime()
+            log_line = self._line_fmt.format(t[1], t[2], t[3], t[4], t[5], _LEVEL_TAGS[level], message)
+        else:
+            log_line = self._line_fmt.format(_LEVEL_TAGS[level], message)
         
-        # 添加消息
-        parts.append(str(message))
+        # 写入文件（ERROR 日志立即写入，防止重启前丢失）
+        self._write_raw(log_line, flush=level >= _ERROR)
         
-        log_line = " ".join(parts) + "\n"
+        # 同时输出到控制台（可选）
+        print(log_line, end="")
+    
+    def is_enabled_for(self, level):
+        """
+        检查指定级别的日志是否会被输出
         
-        # 写入文件
-        self._write_raw(log_line)
+        调用方需要先做额外计算（f-string、gc.mem_free() 等）才能得到日志内容时，
+        可以先检查级别，被过滤时连参数都不用构造:
+            if logger.is_debug():
+                logger.debug(f"mem={gc.mem_free()}")
         
-        # 同时输出到控制台（可选）
-        print(log_line. rstrip())
+        Args:
+            level: 日志级别
+            
+        Returns:
+            bool: 会输出返回 True
+        """
+        return level >= self.level
+    
+    def is_debug(self):
+        """DEBUG 级别日志是否会被输出"""
+        return self.level <= _DEBUG
+    
+    def is_info(self):
+        """INFO 级别日志是否会被输出"""
+        return self.level <= _INFO
     
-    def debug(self, message):
+    def debug(self, message, *args):
         """记录 DEBUG 级别日志"""
-        self._log(self.DEBUG, message)
+        self._log(_DEBUG, message, args)
     
-    def info(self, message):
+    def info(self, message, *args):
         """记录 INFO 级别日志"""
-        self._log(self.INFO, message)
+        self._log(_INFO, message, args)
     
-    def warning(self, message):
+    def warning(self, message, *args):
         """记录 WARNING 级别日志"""
-        self._log(self.WARNING, message)
+        self._log(_WARNING, message, args)
     
-    def error(self, message):
+    def error(self, message, *args):
         """记录 ERROR 级别日志"""
-        self._log(self.ERROR, message)
+        self._log(_ERROR, message, args)
     
     def set_filename(self, new_filename):
         """
@@ -193,6 +245,7 @@ class SimpleLogger:
         try:
             # 关闭当前文件
             if self.file:
+                self.sync()
                 self.file.close()
                 self.file = None
             
@@ -229,16 +282,22 @@ class SimpleLogger:
         return self.filename
     
     def close(self):
-        """关闭日志文件"""
+        """关闭日志文件（先写入缓冲区中的日志）"""
         if self.file:
             try:
+                self.sync()
                 self.file.close()
             except:
                 pass
             self.file = None
     
     def __del__(self):
-        """析构时关闭文件"""
+        """
+        析构时关闭文件
+        
+        MicroPython 不会对用户类调用 __del__，不能依赖它写入缓冲区，
+        程序退出前请显式调用 sync() / close()（或便捷函数 sync_logger()）
+        """
         self.close()
 
 
@@ -253,7 +312,11 @@ class MemoryLogger:
             max_lines: 最大保存行数，默认 50 行
         """
         self.max_lines = max_lines
-        self.logs = []
+        
+        # 固定大小的环形缓冲区，写入 O(1)，不会反复移动和重新分配列表
+        self._buf = [None] * max_lines
+        self._head = 0   # 下一条日志的写入位置
+        self._count = 0  # 当前保存的日志条数
     
     def log(self, message):
         """记录日志到内存"""
@@ -267,11 +330,11 @@ class MemoryLogger:
         except:
             log_line = str(message)
         
-        self.logs.append(log_line)
-        
-        # 保持在最大行数限制内
-        if len(self.logs) > self.max_lines:
-            self.logs.pop(0)
+        # 写入环形缓冲区，满了之后覆盖最旧的一条
+        self._buf[self._head] = log_line
+        self._head = (self._head + 1) % self.max_lines
+        if self._count < self.max_lines:
+            self._count += 1
         
         print(log_line)
     
@@ -283,15 +346,22 @@ class MemoryLogger:
             last_n: 获取最后 N 条，默认全部
             
         Returns:
-            list: 日志列表
+            list: 日志列表（从旧到新）
         """
+        # 按时间顺序还原：未写满时从头开始，写满后从 _head（最旧的一条）开始
+        if self._count < self.max_lines:
+            logs = self._buf[:self._count]
+        else:
+            logs = self._buf[self._head:] + self._buf[:self._head]
+        
         if last_n: 
-            return self.logs[-last_n:]
-        return self. logs. copy()
+            return logs[-last_n:]
+        return logs
     
     def clear(self):
-        """清空日志"""
-        self.logs.clear()
+        """清空日志（不重新分配缓冲区）"""
+        self._head = 0
+        self._count = 0
     
     def save_to_file(self, filename):
         """
@@ -302,7 +372,7 @@ class MemoryLogger:
         """
         try:
             with open(filename, "w") as f:
-                for log in self.logs:
+                for log in self.get_logs():
                     f.write(log + "\n")
             print(f"日志已保存到 {filename}")
             return True
@@ -359,33 +429,39 @@ def get_logger():
     return _global_logger
 
 
-def log_info(message):
+def sync_logger():
+    """把全局日志记录器缓冲区中的日志写入文件（重启前调用，便捷函数）"""
+    if _global_logger:
+        _global_logger.sync()
+
+
+def log_info(message, *args):
     """记录 INFO 日志（便捷函数）"""
     if _global_logger:
-        _global_logger.info(message)
+        _global_logger.info(message, *args)
     else:
-        print(f"[INFO] {message}")
+        print(f"[INFO] {message % args if args else message}")
 
 
-def log_error(message):
+def log_error(message, *args):
     """记录 ERROR 日志（便捷函数）"""
     if _global_logger:
-        _global_logger.error(message)
+        _global_logger.error(message, *args)
     else:
-        print(f"[ERROR] {message}")
+        print(f"[ERROR] {message % args if args else message}")
 
 
-def log_warning(message):
+def log_warning(message, *args):
     """记录 WARNING 日志（便捷函数）"""
     if _global_logger:
-        _global_logger.warning(message)
+        _global_logger.warning(message, *args)
     else:
-        print(f"[WARNING] {message}")
+        print(f"[WARNING] {message % args if args else message}")
 
 
-def log_debug(message):
+def log_debug(message, *args):
     """记录 DEBUG 日志（便捷函数）"""
     if _global_logger: 
-        _global_logger.debug(message)
+        _global_logger.debug(message, *args)
     else:
-        print(f"[DEBUG] {message}")
+        print(f"[DEBUG] {message % args if args else message}")
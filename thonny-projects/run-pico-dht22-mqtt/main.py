@@ -4,17 +4,16 @@ DHT22 温湿度传感器数据采集并发送到 MQTT 服务器
 功能: 每 5 分钟读取一次温湿度数据并通过 MQTT 发布
 """
 
-import json
 import time
 import gc
+import machine
 from machine import Pin, WDT
 from network_utils import WiFiManager, NTPTimeSync
-from logger import init_logger, log_info, log_error, log_warning, get_logger, update_logger_filename
+from logger import init_logger, log_info, log_error, log_warning, get_logger, update_logger_filename, sync_logger
 from dht_sensor import DHT22Sensor
-from mqtt_client import MQTTClientManager
-from system_monitor import SystemMonitor
 
-from hardware_info_helper import get_device_info_all
+# mqtt_client / system_monitor / hardware_info_helper 在用到的初始化函数中再导入，
+# 降低启动时的内存峰值
 
 from secret import (
     WIFI_SSID,
@@ -48,18 +47,36 @@ LOG_MAX_SIZE = 20480  # 20KB
 # 看门狗配置
 WATCHDOG_TIMEOUT = 8000  # 看门狗超时时间（毫秒），8秒 最大8388ms
 WATCHDOG_ENABLED = False   # 是否启用看门狗
-MAX_CONSECUTIVE_ERRORS = 3  # 最大连续错误次数，超过后触发硬重启
+WATCHDOG_FEED_INTERVAL_MS = 7000  # 等待期间的喂狗间隔（毫秒），必须小于超时时间
+FAIL_LIMIT = 3  # 允许的连续失败循环次数，用完后停止喂狗（未启用看门狗时直接重启）
+
+# MQTT 长连接心跳保活时间（秒），需大于采集间隔
+MQTT_KEEPALIVE = 2 * SAMPLE_INTERVAL
+
+# 网络信息缓存刷新间隔（循环次数），SSID/IP 等很少变化
+NET_INFO_REFRESH_LOOPS = 12
+
+# 传感器数据包缓冲区大小（字节），实际数据包约 80 字节
+SENSOR_PAYLOAD_BUF_SIZE = 128
 
 
 # ==================== 全局变量 ====================
 led_pin = Pin(LED_PIN, Pin.OUT)
+sensor_payload_buf = bytearray(SENSOR_PAYLOAD_BUF_SIZE)  # 传感器数据包缓冲区（预先分配，原地写入）
+sensor_payload_mv = memoryview(sensor_payload_buf)
 wifi_manager = None
 time_sync = None
 sensor = None
 mqtt_client = None
 watchdog = None
 system_monitor = None  # 系统状态监控器
-consecutive_errors = 0  # 连续错误计数
+device_info_keys = None  # 设备信息字段顺序（生成模板时确定）
+device_info_types = None  # 设备信息各字段的类型（与 device_info_keys 一一对应）
+device_info_fmt = None   # 设备信息数据包模板
+static_device_info = None  # 启动时读取一次的静态设备信息
+get_device_info_dynamic = None  # hardware_info_helper.get_device_info_dynamic（main() 中导入一次）
+net_info_cache = None    # 网络信息缓存
+net_info_age = 0         # 网络信息缓存已使用的次数
 
 
 def get_local_timestamp():
@@ -74,7 +91,39 @@ def get_local_timestamp():
 def reboot_machine():
     # 清理所有资源（网络、传感器等）
     cleanup_all_resources()
+    sync_logger()
     machine.reset()
+
+def _wait_for_wdt_reset(message="等待看门狗重启设备...", reboot=True, delay=2):
+    """
+    停止喂狗并等待看门狗重启设备（不会返回）
+    
+    Args:
+        message: 启用看门狗时记录的日志
+        reboot: 未启用看门狗时是否软重启，为 False 时直接返回
+        delay: 重启前等待的秒数（等待日志写入）
+    """
+    if WATCHDOG_ENABLED:
+        log_warning(message)
+    # 把缓冲区中的日志写入文件，避免重启后丢失
+    sync_logger()
+    time.sleep(delay)
+    if WATCHDOG_ENABLED:
+        while True:
+            time.sleep(1)  # 等待看门狗触发
+    if reboot:
+        log_warning("重启设备...")
+        reboot_machine()
+
+def _record_mqtt_failure():
+    """记录 MQTT 失败（系统监控器可用时）"""
+    if system_monitor:
+        system_monitor.record_mqtt_failure()
+
+def _record_sensor_error():
+    """记录传感器错误（系统监控器可用时）"""
+    if system_monitor:
+        system_monitor.record_sensor_error()
     
         
 # ==================== 初始化模块 ====================
@@ -102,7 +151,7 @@ def initialize_network():
     time_sync = NTPTimeSync(TIMEZONE_OFFSET)
     
     # 同步时间
-    if not time_sync.sync():
+    if not time_sync.sync(watchdog_feed_callback=feed_watchdog):
         log_warning("时间同步失败，将使用系统时间")
     else:
         log_info(f"当前时间: {time_sync.get_iso8601_time_with_timezone()}")
@@ -127,6 +176,7 @@ def initialize_sensor():
 def initialize_mqtt():
     """初始化MQTT客户端"""
     global mqtt_client
+    from mqtt_client import MQTTClientManager
     
     logger = get_logger()
     mqtt_client = MQTTClientManager(
@@ -135,7 +185,10 @@ def initialize_mqtt():
         port=MQTT_PORT,
         user=MQTT_USER,
         password=MQTT_PASSWORD,
-        logger=logger
+        logger=logger,
+        keepalive=MQTT_KEEPALIVE,
+        # 与系统监控器共享计数器：连接 / 发布 / 错误次数由 MQTT 客户端直接累加
+        counters=system_monitor.counters if system_monitor else None
     )
     
     log_info("MQTT客户端初始化完成")
@@ -145,6 +198,7 @@ def initialize_mqtt():
 def initialize_system_monitor():
     """初始化系统监控器"""
     global system_monitor
+    from system_monitor import SystemMonitor
     
     logger = get_logger()
     system_monitor = SystemMonitor(logger=logger)
@@ -234,8 +288,31 @@ def cleanup_all_resources():
     log_info("资源清理完成")
 
 # ==================== MQTT 数据发布 ====================
-def publish_sensor_data():
-    """读取传感器数据并发布到 MQTT"""
+def _buf_write(buf, pos, data):
+    """把 data 写入 buf 的 pos 位置，返回写入后的位置"""
+    end = pos + len(data)
+    buf[pos:end] = data
+    return end
+
+def build_sensor_payload(created_at, temperature, humidity):
+    """
+    按固定的 JSON 格式把传感器数据直接写入预分配的缓冲区（不经过 json.dumps）
+    
+    Returns:
+        memoryview: 缓冲区中有效数据部分
+    """
+    buf = sensor_payload_buf
+    n = _buf_write(buf, 0, b'{"created_at":"')
+    n = _buf_write(buf, n, created_at.encode())
+    n = _buf_write(buf, n, b'","temperature":')
+    n = _buf_write(buf, n, str(temperature).encode())
+    n = _buf_write(buf, n, b',"humidity":')
+    n = _buf_write(buf, n, str(humidity).encode())
+    n = _buf_write(buf, n, b'}')
+    return sensor_payload_mv[:n]
+
+def prepare_sensor_payload():
+    """读取传感器数据并生成数据包，失败返回 None"""
     # 记录传感器读取
     if system_monitor:
         system_monitor.record_sensor_read()
@@ -245,94 +322,198 @@ def publish_sensor_data():
     
     if result is None:
         log_error("传感器读取失败")
-        if system_monitor:
-            system_monitor.record_sensor_error()
-        return False
+        _record_sensor_error()
+        return None
     
     try:
         temperature, humidity = result
         
         # 构造数据包
-        data = {
-            "created_at": time_sync.get_iso8601_time_with_timezone(),
-            "temperature": temperature,
-            "humidity": humidity,
-        }
-        
-        # 在发布前喂狗
-        feed_watchdog()
-        
-        # 使用封装的MQTT客户端发布JSON数据
-        success = mqtt_client.publish_json(MQTT_TOPIC, data)
-        
-        # 记录MQTT统计
-        if system_monitor:
-            if success:
-                system_monitor.record_mqtt_publish()
-            else:
-                system_monitor.record_mqtt_failure()
-        
-        # 发布后喂狗
-        feed_watchdog()
+        return build_sensor_payload(
+            time_sync.get_iso8601_time_with_timezone(),
+            temperature,
+            humidity,
+        )
         
-        return success
+    except Exception as e:
+        log_error(f"构造数据包失败: {e}")
+        _record_sensor_error()
+        return None
+
+def publish_sensor_data(payload):
+    """发布已生成的传感器数据包到 MQTT"""
+    try:
+        # 数据包已序列化，直接发布（发布 / 错误次数由 MQTT 客户端记录到共享计数器）
+        return mqtt_client.publish_raw(MQTT_TOPIC, payload)
         
     except Exception as e:
         log_error(f"发布数据失败: {e}")
-        if system_monitor:
-            system_monitor.record_mqtt_failure()
+        _record_mqtt_failure()
         return False
 
 # ==================== MQTT 数据发布 ====================
-def publish_device_info_data():
-    """读取设备信息并发布到 MQTT"""
+def get_cached_network_info():
+    """
+    获取网络信息：IP、子网掩码、网关、DNS、MAC 每 NET_INFO_REFRESH_LOOPS 次才刷新一次，
+    信号强度（rssi）随时变化，每次都重新读取
+    """
+    global net_info_cache, net_info_age
+    
+    if net_info_cache is None or net_info_age >= NET_INFO_REFRESH_LOOPS:
+        net_info_cache = wifi_manager.get_network_info()
+        net_info_age = 0
+    else:
+        net_info_cache['rssi'] = wifi_manager.get_rssi()
+    net_info_age += 1
+    return net_info_cache
 
-    # 读取设备信息
-    d_info = get_device_info_all()
+def collect_dynamic_device_info(created_at):
+    """读取每次上报都要刷新的设备信息（动态设备信息、网络信息和上报时间），返回新建的字典"""
+    d_info = get_device_info_dynamic()
     
-    # 读取网络信息
-    net_info = wifi_manager.get_network_info()
+    net_info = get_cached_network_info()
     if net_info:
         d_info.update(net_info)
+    d_info["created_at"] = created_at
+    return d_info
+
+def build_device_info_template():
+    """
+    根据设备信息的字段生成一次数据包模板：静态字段连同值一起转义后写入模板，
+    之后每次发布只格式化动态字段
+    """
+    global device_info_keys, device_info_types, device_info_fmt
     
-    if d_info is None:
-        log_error("设备信息读取失败")
-        return False
+    # json 只在生成模板时用到，不在模块顶部导入
+    import json
     
     try:
-        # 构造数据包
+        d_info = collect_dynamic_device_info("")
+        
+        # 静态字段的值运行期间不变，这里转义一次；与动态字段同名的以动态字段为准
+        fields = []
+        for key, value in static_device_info.items():
+            if key not in d_info:
+                fields.append(('"%s":%s' % (key, json.dumps(value))).replace("%", "%%"))
+        
+        # 动态字段：字符串（时间、IP、MAC）只含字母、数字和 .:-+ 等字符，加引号即可，不需要转义；
+        # None、bool 等按 %s 输出不是合法 JSON，不能放进模板
+        keys = tuple(d_info)
+        types = tuple(type(d_info[key]) for key in keys)
+        for key, t in zip(keys, types):
+            if t is str:
+                fields.append('"%s":"%%s"' % key)
+            elif t is int or t is float:
+                fields.append('"%s":%%s' % key)
+            else:
+                log_warning(f"设备信息字段 {key} 类型为 {t.__name__}，将使用 JSON 序列化")
+                return
+        
+        device_info_keys = keys
+        device_info_types = types
+        device_info_fmt = "{" + ",".join(fields) + "}"
+    except Exception as e:
+        log_warning(f"设备信息模板生成失败，将使用 JSON 序列化: {e}")
+
+def prepare_device_info_payload():
+    """
+    读取设备信息并生成数据包
+    
+    Returns:
+        字段与模板一致时返回已序列化的字符串，否则返回字典（由 publish_json 序列化）；失败返回 None
+    """
+    try:
+        # 读取动态设备信息（静态部分已写入模板，网络信息按间隔刷新）
         if time_sync:
-            d_info["created_at"] = time_sync.get_iso8601_time_with_timezone()
+            created_at = time_sync.get_iso8601_time_with_timezone()
         else:
-            d_info["created_at"] = get_local_timestamp()
-            
-        # 在发布前喂狗
-        feed_watchdog()
+            created_at = get_local_timestamp()
+        d_info = collect_dynamic_device_info(created_at)
         
-        # 使用封装的MQTT客户端发布JSON数据
-        success = mqtt_client.publish_json(MQTT_TOPIC_DeviceInfo, d_info)
+        # 字段数相同且每个字段都在、类型不变时直接格式化（字段集合与模板一致）
+        keys = device_info_keys
+        if device_info_fmt and len(d_info) == len(keys):
+            # 缺少字段时 get 返回 None，类型对不上，退回 JSON 序列化
+            for key, t in zip(keys, device_info_types):
+                if type(d_info.get(key)) is not t:
+                    break
+            else:
+                return device_info_fmt % tuple(d_info[key] for key in keys)
         
-        # 发布后喂狗
-        feed_watchdog()
+        # 退回 JSON 序列化：合并静态字段后交给 publish_json
+        payload = dict(static_device_info)
+        payload.update(d_info)
+        return payload
         
-        return success
+    except Exception as e:
+        log_error(f"设备信息读取失败: {e}")
+        return None
+
+def publish_device_info_data(payload):
+    """发布已生成的设备信息数据包到 MQTT"""
+    try:
+        if isinstance(payload, dict):
+            return mqtt_client.publish_json(MQTT_TOPIC_DeviceInfo, payload)
+        return mqtt_client.publish_raw(MQTT_TOPIC_DeviceInfo, payload)
         
     except Exception as e:
         log_error(f"发布数据失败: {e}")
-        if system_monitor:
-            system_monitor.record_mqtt_failure()
+        _record_mqtt_failure()
         return False
 
+def publish_all_data():
+    """
+    先准备好传感器和设备信息两个数据包，再在同一个连接上发布，
+    两个数据包都准备好时合并为一次 socket 写入（publish_batch），否则逐条发布
+    
+    Returns:
+        bool: 传感器数据发布成功返回 True（设备信息发布失败只记录日志）
+    """
+    sensor_payload = prepare_sensor_payload()
+    device_payload = prepare_device_info_payload()
+    
+    # 在发布前喂狗
+    feed_watchdog()
+    
+    if sensor_payload is not None and device_payload is not None:
+        success = mqtt_client.publish_batch([
+            (MQTT_TOPIC, sensor_payload),
+            (MQTT_TOPIC_DeviceInfo, device_payload),
+        ])
+        if not success:
+            # 两个数据包在同一次写入中发出，失败时两者都没有发布
+            log_error("传感器数据和设备信息发布失败")
+    else:
+        success = sensor_payload is not None and publish_sensor_data(sensor_payload)
+        
+        if device_payload is None or not publish_device_info_data(device_payload):
+            log_error("设备信息发布失败")
+    
+    # 发布后喂狗
+    feed_watchdog()
+    
+    return success
+
+# ==================== MQTT 长连接 ====================
+def ensure_mqtt_connected():
+    """复用已有的 MQTT 连接，心跳失败时才重新连接"""
+    if mqtt_client.is_connected() and mqtt_client.ping():
+        return True
+    
+    # 连接到 MQTT 服务器（并在重试时喂狗），连接次数由 MQTT 客户端记录到共享计数器
+    return mqtt_client.connect(retry_count=3, watchdog_feed_callback=feed_watchdog)
+
 # ==================== 主循环 ====================
 def start_main_loop():
     """主循环:  连接 MQTT 并定期发布传感器数据"""
-    global consecutive_errors
+    global net_info_cache
     
     log_info("启动主循环")
     
     try:
         # 主循环
         loop_count = 0
+        fails_left = FAIL_LIMIT  # 剩余容错次数，循环成功时恢复
         while True:
             loop_count += 1
             loop_success = True
@@ -361,63 +542,41 @@ def start_main_loop():
                             is_wifi_connected = False
                     else:
                         is_wifi_connected = True
+                        net_info_cache = None  # 重连后 IP 等可能变化，刷新缓存
                         if system_monitor:
                             system_monitor.record_wifi_connect(is_reconnect=True)
                         feed_watchdog()  # 重连后喂狗
                 
                 if is_wifi_connected:
-                    # 连接到 MQTT 服务器（并在重试时喂狗）
-                    if not mqtt_client.connect(retry_count=3, watchdog_feed_callback=feed_watchdog):
+                    # 确认 MQTT 长连接可用（断开时重连）
+                    if not ensure_mqtt_connected():
                         log_error("MQTT 连接失败，跳过本次发布")
-                        if system_monitor:
-                            system_monitor.record_mqtt_failure()
                         loop_success = False
                     else:
-                        if system_monitor:
-                            system_monitor.record_mqtt_connect()
-                        
-                        # 发布传感器数据
-                        if not publish_sensor_data():
+                        # 连续发布传感器数据和设备信息数据
+                        if not publish_all_data():
                             loop_success = False
-
-                        # 发布设备信息数据
-                        if not publish_device_info_data():
-                            log_error("设备信息发布失败")
                         
-                        # 断开 MQTT 连接
-                        mqtt_client.disconnect()
+                        # 保持 MQTT 连接，下次循环复用（在 cleanup_all_resources 中断开）
                 
                 # 记录循环结果
                 if loop_success:
-                    consecutive_errors = 0
+                    fails_left = FAIL_LIMIT
                     if system_monitor:
                         system_monitor.record_loop_success()
                 else:
-                    consecutive_errors += 1
+                    fails_left -= 1
                     if system_monitor:
                         system_monitor.record_loop_failure()
-                    log_warning(f"本次循环失败，连续错误次数: {consecutive_errors}/{MAX_CONSECUTIVE_ERRORS}")
-                
-                # 检查是否达到最大连续错误次数
-                if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
-                    loop_success = False
-                    log_error(f"连续错误次数达到 {MAX_CONSECUTIVE_ERRORS} 次，触发设备重启0")
-                    time.sleep(2)  # 等待日志写入
-                    # 停止喂狗，让看门狗触发重启
-                    if WATCHDOG_ENABLED:
-                        log_info("停止喂狗，等待看门狗重启设备...")
-                        while True:
-                            time.sleep(1)  # 等待看门狗触发
-                    else:
-                        reboot_machine()
+                    log_warning("本次循环失败，剩余容错次数: %s/%s", fails_left, FAIL_LIMIT)
                 
                 # 每 10 次循环显示一次统计信息
                 if loop_count % 10 == 0:
                     sensor_stats = sensor.get_statistics()
                     mqtt_stats = mqtt_client.get_statistics()
-                    log_info(f"传感器统计: {sensor_stats}")
-                    log_info(f"MQTT统计: {mqtt_stats}")
-                    log_info(f"连续错误计数: {consecutive_errors}")
+                    log_info("传感器统计: %s", sensor_stats)
+                    log_info("MQTT统计: %s", mqtt_stats)
+                    log_info("剩余容错次数: %s", fails_left)
                     
                     # 显示系统监控状态
                     if system_monitor:
@@ -425,45 +584,39 @@ def start_main_loop():
                         # 检查系统健康状态
                         is_healthy, issues = system_monitor.check_health()
                         if not is_healthy:
-                            log_warning(f"系统健康检查发现问题: {', '.join(issues)}")
+                            log_warning("系统健康检查发现问题: %s", ', '.join(issues))
                 
             except Exception as loop_error:
-                consecutive_errors += 1
-                log_error(f"循环内异常: {type(loop_error).__name__} - {loop_error}")
-                log_warning(f"连续错误次数: {consecutive_errors}/{MAX_CONSECUTIVE_ERRORS}")
-                
-                # 检查是否需要硬重启
-                if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
-                    loop_success = False
-                    log_error(f"连续错误次数达到 {MAX_CONSECUTIVE_ERRORS} 次，触发设备重启1")
-                    time.sleep(2)
-                    # 停止喂狗，让看门狗触发重启
-                    if WATCHDOG_ENABLED:
-                        log_info("停止喂狗，等待看门狗重启设备...")
-                        while True:
-                            time.sleep(1)
-                    else:
-                        reboot_machine()
+                loop_success = False
+                fails_left -= 1
+                log_error("循环内异常: %s - %s", type(loop_error).__name__, loop_error)
+                log_warning("剩余容错次数: %s/%s", fails_left, FAIL_LIMIT)
+            
+            # 容错次数用完：启用看门狗时停止喂狗，由看门狗重启设备；否则直接重启
+            if fails_left <= 0:
+                log_error("连续失败 %s 次，触发设备重启", FAIL_LIMIT)
+                _wait_for_wdt_reset("停止喂狗，等待看门狗重启设备...")
             
             # 喂狗 - 循环结束前
             feed_watchdog()
             
             # 等待下次采集（分段睡眠以便定期喂狗）
             if WATCHDOG_ENABLED:
-                log_info(f"等待 {SAMPLE_INTERVAL} 秒...")
-                sleep_interval = 7  # 每7秒喂一次狗
-                remaining_time = SAMPLE_INTERVAL
-                while remaining_time > 0:
-                    sleep_time = min(sleep_interval, remaining_time)
-                    time.sleep(sleep_time)
+                log_info("等待 %s 秒...", SAMPLE_INTERVAL)
+                # 按截止时间分段睡眠，每段不超过喂狗间隔
+                remaining_ms = SAMPLE_INTERVAL * 1000
+                deadline = time.ticks_add(time.ticks_ms(), remaining_ms)
+                while remaining_ms > 0:
+                    time.sleep_ms(min(WATCHDOG_FEED_INTERVAL_MS, remaining_ms))
                     feed_watchdog()  # 在等待期间定期喂狗
-                    remaining_time -= sleep_time
+                    mqtt_client.drain()  # 空闲时补发因 socket 不可写而排队的消息
+                    remaining_ms = time.ticks_diff(deadline, time.ticks_ms())
             else:
                 if is_wifi_connected and loop_success:
-                    log_info(f"等待 {SAMPLE_INTERVAL} 秒...")
+                    log_info("等待 %s 秒...", SAMPLE_INTERVAL)
                     time.sleep(SAMPLE_INTERVAL)
                 else:
-                    log_info(f"等待 4 秒...")
+                    log_info("等待 4 秒...")
                     time.sleep(4)
             
     except KeyboardInterrupt:
@@ -471,18 +624,12 @@ def start_main_loop():
         print("程序已停止")
         # 用户中断时，停止喂狗，让设备重启
         if WATCHDOG_ENABLED:
-            log_info("等待看门狗重启设备...")
-            while True:
-                time.sleep(1)
+            _wait_for_wdt_reset()
         
     except Exception as e:
         log_error(f"主循环严重异常: {type(e).__name__} - {e}")
-        log_error("停止喂狗，等待看门狗重启设备...")
-        time.sleep(2)
         # 停止喂狗，让看门狗触发重启
-        if WATCHDOG_ENABLED:
-            while True:
-                time.sleep(1)
+        _wait_for_wdt_reset("停止喂狗，等待看门狗重启设备...", reboot=False)
         
     finally:
         # 显示最终统计
@@ -501,12 +648,12 @@ def start_main_loop():
         # 清理所有资源（网络、传感器等）
         # cleanup_all_resources()
         
+        # 日志是缓冲写入的，任何退出路径都要把缓冲区（包括上面的最终统计）写入文件
+        sync_logger()
+        
         # 等待看门狗重启设备
         if WATCHDOG_ENABLED:
-            log_warning("等待看门狗重启设备...")
-            time.sleep(2)
-            while True:
-                time.sleep(1)
+            _wait_for_wdt_reset()
 
 def update_logger_filename_with_date():
     # 重命名日志文件为带日期的文件名
@@ -521,7 +668,7 @@ def update_logger_filename_with_date():
 # ==================== 程序入口 ====================
 def main():
     """程序主入口"""
-    global consecutive_errors
+    global static_device_info, get_device_info_dynamic
     
     # 1. 初始化日志
     initialize_logger()
@@ -532,37 +679,40 @@ def main():
     # 3. 初始化网络连接
     if not initialize_network():
         log_error("网络初始化失败")
-        if WATCHDOG_ENABLED:
-            while True:
-                time.sleep(1)  # 等待看门狗触发重启
-        else:
+        if not WATCHDOG_ENABLED:
             log_error("6秒后重启")
-            time.sleep(6)
-            reboot_machine()
+        _wait_for_wdt_reset(delay=6)
             
     # 3.1 更新日志文件名
     update_logger_filename_with_date()
+    gc.collect()
      
     # 4. 初始化传感器
     initialize_sensor()
+    gc.collect()
     
-    # 5. 初始化MQTT客户端
-    initialize_mqtt()
-    
-    # 6. 初始化系统监控器
+    # 5. 初始化系统监控器（先于 MQTT 客户端，以便共享计数器）
     initialize_system_monitor()
+    gc.collect()
     
-    # 7. 重置错误计数
-    consecutive_errors = 0
+    # 6. 初始化MQTT客户端
+    initialize_mqtt()
+    gc.collect()
+    
+    # 6.1 读取静态设备信息，并生成设备信息数据包模板（动态信息函数在这里绑定一次，发布时不再 import）
+    from hardware_info_helper import get_device_info_static, get_device_info_dynamic
+    static_device_info = get_device_info_static()
+    build_device_info_template()
+    gc.collect()
     
-    # 8. 点亮 LED 表示就绪
+    # 7. 点亮 LED 表示就绪
     led_pin.on()
     log_info("系统就绪")
     
-    # 9. 喂狗后启动主循环
+    # 8. 喂狗后启动主循环
     feed_watchdog()
     
-    # 10. 启动主循环
+    # 9. 启动主循环
     start_main_loop()
 
 
@@ -0,0 +1,28 @@
+"""
+固件冻结清单（MicroPython manifest）
+将项目模块预编译为字节码并冻结到固件中，运行时无需解析编译 .py，
+字节码直接在 Flash 中执行，不占用 RAM
+
+构建方法（在 micropython/ports/rp2 目录下）:
+    make BOARD=RPI_PICO_W FROZEN_MANIFEST=/path/to/run-pico-dht22-mqtt/manifest.py
+
+注意:
+    - secret.py 包含 WiFi / MQTT 凭据，不冻结，仍放在设备文件系统中
+    - main.py 不冻结：启动时固件中冻结的 main.py 会先于文件系统中的 main.py 执行，
+      冻结后只能重新编译刷写固件才能更新。main.py 代码量小，放在文件系统中直接替换即可
+    - import 时文件系统中存在同名 .py 会优先导入文件系统中的版本，刷入固件后应删除设备上的旧模块文件
+"""
+
+# 保留开发板默认的冻结模块（网络驱动、asyncio 等）
+include("$(BOARD_DIR)/manifest.py")
+
+# mqtt_client 依赖的 umqtt.simple
+require("umqtt.simple")
+
+# 项目模块（-O3 去掉文档字符串和 assert，进一步减小固件体积）
+module("dht_sensor.py", opt=3)
+module("logger.py", opt=3)
+module("network_utils.py", opt=3)
+module("mqtt_client.py", opt=3)
+module("system_monitor.py", opt=3)
+module("hardware_info_helper.py", opt=3)
@@ -3,14 +3,53 @@ MQTT 客户端封装模块
 提供 MQTT 连接、发布、订阅等功能
 """
 
-import json
-from umqtt.simple import MQTTClient as UMQTTClient
+import time
+import array
+import urandom
+import uselect
+from micropython import const
+from umqtt.simple import MQTTClient as UMQTTClient, MQTTException
+
+
+# 收发过程中预期会出现的异常：网络错误和协议错误（socket 已关闭的情况在调用前用 _sock_ready() 检查）
+# 其余异常（尤其是 MemoryError 和编程错误）不在这里吞掉，交给上层处理（必要时重启设备）
+_NET_ERRORS = (OSError, MQTTException)
+
+# 错误日志模板（异常类型名, 异常信息）
+_DRAIN_ERR_FMT = "MQTT 待发送消息发布失败: {} - {}"
+_PUBLISH_ERR_FMT = "MQTT 发布失败: {} - {}"
+_BATCH_ERR_FMT = "MQTT 批量发布失败: {} - {}"
+_SUBSCRIBE_ERR_FMT = "MQTT 订阅失败: {} - {}"
+_CHECK_ERR_FMT = "MQTT 消息检查失败: {} - {}"
+_WAIT_ERR_FMT = "MQTT 消息等待失败: {} - {}"
+_PING_ERR_FMT = "MQTT 心跳失败，连接已断开: {} - {}"
+
+# 计数器数组下标。与 SystemMonitor 共享计数器数组时，这三项就是它的 MQTT 统计
+# （system_monitor.py 中的 _C_MQTT_* 与这里保持一致）
+MQTT_CONNECTS = const(0)    # 连接次数
+MQTT_PUBLISHES = const(1)   # 发布次数
+MQTT_ERRORS = const(2)      # 错误次数
+MQTT_COUNTER_COUNT = const(3)
 
 
 class MQTTClientManager:
     """MQTT 客户端管理器"""
     
-    def __init__(self, client_id, server, port=1883, user=None, password=None, logger=None):
+    # JSON 编码缓冲区大小（字节），编码结果超出时退回 json.dumps
+    JSON_BUF_SIZE = 256
+    # 批量发布缓冲区大小（字节），一批消息的 PUBLISH 报文总长超出时退回逐条发布
+    BATCH_BUF_SIZE = 1024
+    # 退避等待期间每段睡眠的时长（毫秒），两段之间喂狗
+    BACKOFF_SLICE_MS = 100
+    # socket 暂时不可写时最多缓存的待发送消息条数，满了丢弃最早的一条
+    PENDING_SIZE = 8
+    # 普通日志限流（令牌桶）：每秒补充的令牌数和桶容量，错误日志不受限制
+    LOG_RATE_PER_S = 2
+    LOG_BURST = 5
+    
+    def __init__(self, client_id, server, port=1883, user=None, password=None, logger=None, keepalive=0,
+                 backoff_base_ms=500, backoff_cap_ms=30000, backoff_multiplier=2, counters=None,
+                 rx_bufsize=0):
         """
         初始化 MQTT 客户端管理器
         
@@ -21,6 +60,14 @@ class MQTTClientManager:
             user: 用户名（可选）
             password: 密码（可选）
             logger: 日志记录器（可选）
+            keepalive: 心跳保活时间（秒），默认 0（不启用）。长连接时应大于发布间隔
+            backoff_base_ms: 连接重试退避的初始上限（毫秒），默认 500
+            backoff_cap_ms: 连接重试退避的最大上限（毫秒），默认 30000
+            backoff_multiplier: 每次重试退避上限的增长倍数，默认 2
+            counters: 共享的计数器数组（可选，例如 SystemMonitor.counters），按 MQTT_* 下标累加；
+                      默认使用自己的数组
+            rx_bufsize: 订阅消息接收缓冲区大小（字节），默认 0（不启用）。大于 0 时 check_msg / wait_msg
+                        把主题和消息直接读入该缓冲区，回调收到的是 memoryview，见 subscribe()
         """
         self.client_id = client_id
         self.server = server
@@ -28,16 +75,240 @@ class MQTTClientManager:
         self.user = user
         self.password = password
         self.logger = logger
-        self.client = None
+        self.keepalive = keepalive
+        
+        # 日志令牌桶：串口输出较慢，频繁的普通日志会拖慢主循环
+        self._log_tokens = self.LOG_BURST
+        self._log_last_ms = time.ticks_ms()
+        self._suppressed = 0   # 被限流跳过的日志条数，下一条输出时附带
         self.is_connected_flag = False
         
-        # 统计信息
-        self.connect_count = 0
-        self.publish_count = 0
-        self.error_count = 0
+        # 连接重试的退避参数
+        self.backoff_base_ms = backoff_base_ms
+        self.backoff_cap_ms = backoff_cap_ms
+        self.backoff_multiplier = backoff_multiplier
+        
+        # 客户端对象只创建一次，重连时复用（umqtt 每次 connect() 会自行新建 socket）
+        self.client = None
+        self._create_client()
+        
+        # 统计信息（连接 / 发布 / 错误次数），可与系统监控器共享同一个数组
+        if counters is None:
+            counters = array.array('I', bytes(4 * MQTT_COUNTER_COUNT))
+        self._c = counters
+        
+        # 字典消息的 JSON 编码缓存：字段相同的字典复用键片段，直接写入预分配缓冲区
+        self._json_buf = bytearray(self.JSON_BUF_SIZE)
+        self._json_mv = memoryview(self._json_buf)
+        self._last_keys = None   # 上次编码的字段
+        self._key_frags = None   # 每个字段对应的 '{"key":' / ',"key":' 片段
+        
+        # 批量发布缓冲区（第一次批量发布时分配）
+        self._batch_buf = None
+        
+        # 非阻塞发布：连接后用 poll 检查 socket 是否可写，不可写时消息先放进环形队列
+        self._poller = None
+        self._pending = [None] * self.PENDING_SIZE   # (topic, message, qos, retain)
+        self._pending_head = 0   # 最早一条待发送消息的下标
+        self._pending_count = 0
+        self.dropped_count = 0   # 队列满时丢弃的消息数
+        
+        self._cb = None   # 当前的用户消息回调
+        
+        # 订阅消息接收缓冲区（可选）：PUBLISH 报文用 readinto 读入，不为每条消息分配新的 bytes
+        self._rx_buf = bytearray(rx_bufsize) if rx_bufsize > 0 else None
+        self._rx_mv = memoryview(self._rx_buf) if self._rx_buf is not None else None
+        self._rx_hdr = bytearray(2)                   # 报头 / 长度 / 报文标识符
+        self._rx_ack = bytearray(b"\x40\x02\0\0")     # QoS 1 的 PUBACK 报文
+    
+    @property
+    def connect_count(self):
+        """连接次数"""
+        return self._c[MQTT_CONNECTS]
+    
+    @property
+    def publish_count(self):
+        """发布次数"""
+        return self._c[MQTT_PUBLISHES]
+    
+    @property
+    def error_count(self):
+        """错误次数"""
+        return self._c[MQTT_ERRORS]
+    
+    def _create_client(self):
+        """创建 umqtt 客户端对象"""
+        self.client = UMQTTClient(
+            client_id=self.client_id,
+            server=self.server,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            keepalive=self.keepalive
+        )
+        # 新的客户端对象还没有安装消息回调
+        self._cb_installed = False
+    
+    def _reset_socket(self):
+        """关闭并丢弃客户端当前的 socket（客户端对象保留，下次 connect() 时重新建立）"""
+        sock = self.client.sock if self.client else None
+        if sock:
+            try:
+                sock.close()
+            except Exception:
+                pass
+            self.client.sock = None
+        self._poller = None
     
-    def _log(self, message, is_error=False):
-        """内部日志方法"""
+    def _sock_ready(self):
+        """
+        检查是否已连接且 socket 可用（socket 被关闭后 umqtt 的 sock 为 None）
+        
+        Returns:
+            bool: 可以收发数据返回 True
+        """
+        client = self.client
+        return self.is_connected_flag and client is not None and client.sock is not None
+    
+    def _register_poller(self):
+        """为当前 socket 注册可写事件轮询"""
+        poller = uselect.poll()
+        poller.register(self.client.sock, uselect.POLLOUT)
+        self._poller = poller
+    
+    def _writable(self):
+        """
+        检查 socket 当前是否可写（不阻塞）
+        
+        Returns:
+            bool: 可写返回 True；出错/挂断也返回 True，让后续写入抛出异常走正常的错误处理
+        """
+        poller = self._poller
+        if poller is None:
+            return True
+        return bool(poller.poll(0))
+    
+    def _enqueue(self, topic, message, qos, retain):
+        """
+        把消息放进待发送队列，队列满时丢弃最早的一条
+        
+        Args:
+            topic: 主题
+            message: 消息内容（memoryview 会被复制，避免缓冲区被下次编码覆盖）
+            qos: QoS 等级
+            retain: 是否保留消息
+        """
+        if isinstance(message, memoryview):
+            message = bytes(message)
+        size = self.PENDING_SIZE
+        if self._pending_count == size:
+            self._pending_head = (self._pending_head + 1) % size
+            self._pending_count -= 1
+            self.dropped_count += 1
+            self._log("待发送队列已满，丢弃最早的一条消息", is_error=True)
+        self._pending[(self._pending_head + self._pending_count) % size] = (topic, message, qos, retain)
+        self._pending_count += 1
+    
+    def pending_count(self):
+        """
+        获取待发送队列中的消息条数
+        
+        Returns:
+            int: 待发送消息条数
+        """
+        return self._pending_count
+    
+    def drain(self):
+        """
+        在 socket 可写时按顺序发送待发送队列中的消息，不可写时立即返回
+        （主循环空闲时调用；publish 之前也会先调用一次以保证消息顺序）
+        
+        Returns:
+            int: 本次发送成功的消息条数
+        """
+        sent = 0
+        if not self._pending_count or not self._sock_ready():
+            return sent
+        
+        pending = self._pending
+        size = self.PENDING_SIZE
+        try:
+            while self._pending_count and self._writable():
+                head = self._pending_head
+                topic, message, qos, retain = pending[head]
+                self.client.publish(topic, message, qos=qos, retain=retain)
+                pending[head] = None
+                self._pending_head = (head + 1) % size
+                self._pending_count -= 1
+                self._c[MQTT_PUBLISHES] += 1
+                sent += 1
+        except _NET_ERRORS as e:
+            self._c[MQTT_ERRORS] += 1
+            self._log(_DRAIN_ERR_FMT.format(type(e).__name__, e), is_error=True)
+        
+        if sent:
+            self._log("MQTT 补发 %d 条待发送消息", sent)
+        return sent
+    
+    def _backoff_delay_ms(self, attempt):
+        """
+        计算第 attempt 次失败后的等待时间（"全抖动"退避）：
+        在 0 ~ min(上限, 初始值 * 倍数^attempt) 之间均匀随机，避免多台设备同时重连
+        
+        Args:
+            attempt: 已失败的次数（从 0 开始）
+            
+        Returns:
+            int: 等待时间（毫秒）
+        """
+        ceiling = min(self.backoff_cap_ms, self.backoff_base_ms * self.backoff_multiplier ** attempt)
+        return urandom.getrandbits(30) % (int(ceiling) + 1)
+    
+    def _backoff_sleep(self, delay_ms, watchdog_feed_callback=None):
+        """
+        分段睡眠 delay_ms 毫秒，每段之间喂狗，避免长时间退避触发看门狗
+        
+        Args:
+            delay_ms: 等待时间（毫秒）
+            watchdog_feed_callback: 看门狗喂狗回调函数（可选）
+        """
+        slice_ms = self.BACKOFF_SLICE_MS
+        while delay_ms > 0:
+            step = slice_ms if delay_ms > slice_ms else delay_ms
+            time.sleep_ms(step)
+            delay_ms -= step
+            if watchdog_feed_callback:
+                watchdog_feed_callback()
+    
+    def _log(self, message, *args, is_error=False):
+        """
+        内部日志方法
+        
+        普通日志经过令牌桶限流，被跳过的条数在下一条输出的日志里注明；错误日志总是输出
+        
+        Args:
+            message: 日志消息（有 args 时作为 % 格式模板，限流跳过时不做格式化）
+            *args: 格式化参数
+            is_error: 是否为错误日志
+        """
+        if not is_error:
+            now = time.ticks_ms()
+            tokens = self._log_tokens + time.ticks_diff(now, self._log_last_ms) * self.LOG_RATE_PER_S / 1000
+            self._log_last_ms = now
+            if tokens > self.LOG_BURST:
+                tokens = self.LOG_BURST
+            if tokens < 1:
+                self._log_tokens = tokens
+                self._suppressed += 1
+                return
+            self._log_tokens = tokens - 1
+        
+        if args:
+            message = message % args
+        if self._suppressed:
+            message = "(+{} 条日志被限流跳过) {}".format(self._suppressed, message)
+            self._suppressed = 0
+        
         if self.logger:
             if is_error:
                 self.logger.error(message)
@@ -63,32 +334,31 @@ class MQTTClientManager:
                 if watchdog_feed_callback:
                     watchdog_feed_callback()
                 
-                # 如果已经连接，先断开
-                if self.client:
+                # 如果已经连接，先断开，并关闭旧的 socket
+                if self.is_connected_flag:
                     try:
                         self.client.disconnect()
                     except:
                         pass
+                    self.is_connected_flag = False
                 
-                # 创建新的客户端
-                self.client = UMQTTClient(
-                    client_id=self.client_id,
-                    server=self.server,
-                    port=self.port,
-                    user=self.user,
-                    password=self.password
-                )
+                # 复用已有的客户端对象（cleanup() 之后才需要重新创建）
+                if self.client is None:
+                    self._create_client()
+                else:
+                    self._reset_socket()
                 
                 # 连接到服务器
                 self.client.connect()
+                self._register_poller()
                 self.is_connected_flag = True
-                self.connect_count += 1
+                self._c[MQTT_CONNECTS] += 1
                 
                 self._log(f"MQTT 连接成功: {self.server}:{self.port}")
                 return True
                 
             except Exception as e:
-                self.error_count += 1
+                self._c[MQTT_ERRORS] += 1
                 error_msg = f"MQTT 连接失败 (尝试 {attempt + 1}/{retry_count}): {type(e).__name__} - {e}"
                 
                 if attempt == retry_count - 1:
@@ -97,58 +367,217 @@ class MQTTClientManager:
                     return False
                 else:
                     self._log(error_msg)
+                    # 随机退避后再重试，避免服务器恢复时被集中重连
+                    delay_ms = self._backoff_delay_ms(attempt)
+                    self._log("%d ms 后重试 MQTT 连接", delay_ms)
+                    self._backoff_sleep(delay_ms, watchdog_feed_callback)
         
         return False
     
     def disconnect(self):
         """断开 MQTT 连接"""
         try:
-            if self.client:
+            if self.client and self.is_connected_flag:
                 self.client.disconnect()
                 self._log("MQTT 已断开")
         except Exception as e:
             self._log(f"MQTT 断开异常: {e}", is_error=True)
         finally:
+            # 只关闭 socket，客户端对象保留给下次 connect() 复用
             self.is_connected_flag = False
-            self.client = None
+            self._reset_socket()
+    
+    def _encode_json(self, data):
+        """
+        把字典编码为 JSON
+        
+        字段与上次相同时按缓存的键片段把值直接写入预分配缓冲区，
+        字段变化或缓冲区不足时退回 json.dumps（并更新缓存）
+        
+        Args:
+            data: 要编码的字典
+            
+        Returns:
+            memoryview 或 str: 编码结果（memoryview 指向内部缓冲区，下次编码前有效）
+        """
+        # 只发布字符串消息时不需要 json，第一次编码字典时才导入
+        import json
+        
+        keys = self._last_keys
+        if keys is None or len(keys) != len(data) or not all(k in data for k in keys):
+            keys = tuple(data)
+            self._last_keys = keys
+            self._key_frags = [(('{' if i == 0 else ',') + json.dumps(k) + ':').encode()
+                               for i, k in enumerate(keys)]
+            return json.dumps(data)
+        
+        buf = self._json_buf
+        mv = self._json_mv
+        size = len(buf)
+        n = 0
+        for frag, key in zip(self._key_frags, keys):
+            value = data[key]
+            # 数字直接 str()，其他类型（字符串、布尔、None 等）交给 json.dumps 处理转义
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value).encode()
+            else:
+                value = json.dumps(value).encode()
+            end = n + len(frag) + len(value)
+            if end >= size:
+                return json.dumps(data)
+            mv[n:n + len(frag)] = frag
+            mv[n + len(frag):end] = value
+            n = end
+        mv[n:n + 1] = b'}'
+        return mv[:n + 1]
     
-    def publish(self, topic, message, qos=0, retain=False):
+    def publish_raw(self, topic, message, qos=0, retain=False):
         """
-        发布消息到 MQTT 主题
+        发布已序列化好的消息到 MQTT 主题（不做类型检查和 JSON 转换）
+        
+        publish() 是它的别名；字典请使用 publish_json()
         
         Args:
             topic: 主题
-            message: 消息内容（字符串或字典）
+            message: 消息内容（字符串、bytes 或 memoryview）
             qos: QoS 等级，默认 0
             retain: 是否保留消息，默认 False
-            
+        
         Returns:
             bool: 发布成功返回 True，失败返回 False
         """
         try:
-            if not self.is_connected_flag or not self.client:
+            if not self._sock_ready():
                 self._log("MQTT 未连接，无法发布消息", is_error=True)
                 return False
             
-            # 如果消息是字典，转换为 JSON
-            if isinstance(message, dict):
-                message = json.dumps(message)
+            # 先发送之前排队的消息；仍有积压或 socket 不可写时排队，不阻塞主循环
+            if self._pending_count:
+                self.drain()
+            if self._pending_count or not self._writable():
+                self._enqueue(topic, message, qos, retain)
+                self._log("MQTT socket 暂不可写，消息已加入待发送队列: %s", topic)
+                return True
             
             # 发布消息
             self.client.publish(topic, message, qos=qos, retain=retain)
-            self.publish_count += 1
             
-            self._log(f"MQTT 消息已发布到 {topic}: {message}")
-            return True
+        except _NET_ERRORS as e:
+            self._c[MQTT_ERRORS] += 1
+            self._log(_PUBLISH_ERR_FMT.format(type(e).__name__, e), is_error=True)
+            return False
+        
+        # 已经发出，计数和日志放在 try 之外，日志出错不会把成功的发布算成失败
+        self._c[MQTT_PUBLISHES] += 1
+        
+        # 成功日志每次发布都会触发，日志级别不输出 INFO 时直接跳过
+        logger = self.logger
+        if logger is None or logger.is_info():
+            # memoryview 没有可读的字符串形式，转成 bytes 再记录
+            if isinstance(message, memoryview):
+                message = bytes(message)
+            self._log("MQTT 消息已发布到 %s: %s", topic, message)
+        return True
+    
+    # 普通发布只接受字符串 / bytes，是 publish_raw 的别名（省去一层调用）
+    publish = publish_raw
+    
+    def publish_batch(self, messages, retain=False):
+        """
+        批量发布 QoS 0 消息：所有 PUBLISH 报文写入同一个缓冲区，一次 socket 写入发出
+        
+        Args:
+            messages: [(topic, message), ...]，message 可以是字符串、bytes、memoryview 或字典
+            retain: 是否保留消息，默认 False
             
-        except Exception as e:
-            self.error_count += 1
-            self._log(f"MQTT 发布失败: {type(e).__name__} - {e}", is_error=True)
+        Returns:
+            bool: 全部发布成功返回 True，失败返回 False
+        """
+        try:
+            if not self._sock_ready():
+                self._log("MQTT 未连接，无法发布消息", is_error=True)
+                return False
+            
+            # 有积压或 socket 不可写时逐条发布（由 publish 负责排队）
+            if self._pending_count:
+                self.drain()
+            if self._pending_count or not self._writable():
+                ok = True
+                for t, m in messages:
+                    if isinstance(m, dict):
+                        ok = self.publish_json(t, m, retain=retain) and ok
+                    else:
+                        ok = self.publish_raw(t, m, retain=retain) and ok
+                return ok
+            
+            buf = self._batch_buf
+            if buf is None:
+                buf = self._batch_buf = bytearray(self.BATCH_BUF_SIZE)
+            mv = memoryview(buf)
+            size = len(buf)
+            header = 0x31 if retain else 0x30  # PUBLISH，QoS 0
+            n = 0
+            
+            for topic, message in messages:
+                if isinstance(topic, str):
+                    topic = topic.encode()
+                if isinstance(message, dict):
+                    message = self._encode_json(message)
+                if isinstance(message, str):
+                    message = message.encode()
+                
+                # 剩余长度 = 主题长度(2) + 主题 + 消息（QoS 0 没有报文标识符）
+                remaining = 2 + len(topic) + len(message)
+                if n + 5 + remaining > size:
+                    # 缓冲区放不下，退回逐条发布
+                    self._log("批量发布数据过长，改为逐条发布")
+                    ok = True
+                    for t, m in messages:
+                        if isinstance(m, dict):
+                            ok = self.publish_json(t, m, retain=retain) and ok
+                        else:
+                            ok = self.publish_raw(t, m, retain=retain) and ok
+                    return ok
+                
+                # 固定报头 + 变长编码的剩余长度
+                buf[n] = header
+                n += 1
+                while True:
+                    b = remaining & 0x7F
+                    remaining >>= 7
+                    if remaining:
+                        b |= 0x80
+                    buf[n] = b
+                    n += 1
+                    if not remaining:
+                        break
+                
+                # 主题（2 字节长度 + 内容）和消息
+                buf[n] = len(topic) >> 8
+                buf[n + 1] = len(topic) & 0xFF
+                n += 2
+                mv[n:n + len(topic)] = topic
+                n += len(topic)
+                mv[n:n + len(message)] = message
+                n += len(message)
+            
+            self.client.sock.write(mv[:n])
+            
+        except _NET_ERRORS as e:
+            self._c[MQTT_ERRORS] += 1
+            self._log(_BATCH_ERR_FMT.format(type(e).__name__, e), is_error=True)
             return False
+        
+        self._c[MQTT_PUBLISHES] += len(messages)
+        
+        logger = self.logger
+        if logger is None or logger.is_info():
+            self._log("MQTT 批量发布 %d 条消息（%d 字节）", len(messages), n)
+        return True
     
     def publish_json(self, topic, data, qos=0, retain=False):
         """
-        发布 JSON 数据到 MQTT 主题
+        发布 JSON 数据到 MQTT 主题（字段不变时复用编码缓存，直接写入预分配缓冲区）
         
         Args:
             topic: 主题
@@ -159,7 +588,117 @@ class MQTTClientManager:
         Returns:
             bool: 发布成功返回 True，失败返回 False
         """
-        return self.publish(topic, data, qos=qos, retain=retain)
+        return self.publish_raw(topic, self._encode_json(data), qos=qos, retain=retain)
+    
+    def _on_message(self, topic, msg):
+        """
+        umqtt 消息回调：转交给当前的用户回调（更换回调时不必重新安装到 umqtt 客户端）
+        
+        Args:
+            topic: 主题
+            msg: 消息内容（bytes，原样传递）
+        """
+        callback = self._cb
+        if callback is not None:
+            callback(topic, msg)
+    
+    def _read_msg(self, blocking):
+        """
+        读取并处理一个报文（按 umqtt.simple 的 wait_msg 改写）
+        
+        PUBLISH 报文的主题和消息用 readinto 直接读入接收缓冲区，以 memoryview 交给回调；
+        放不下时退回 sock.read() 分配 bytes。其余报文的处理与 umqtt 相同
+        
+        Args:
+            blocking: False 时没有数据立即返回（check_msg），True 时阻塞等待（wait_msg）
+            
+        Returns:
+            收到的报文类型，没有数据或收到 PINGRESP 时返回 None
+        """
+        sock = self.client.sock
+        hdr = self._rx_hdr
+        sock.setblocking(blocking)
+        n = sock.readinto(hdr, 1)
+        sock.setblocking(True)
+        if n is None:
+            return None
+        if not n:
+            raise OSError(-1)
+        op = hdr[0]
+        if op == 0xD0:  # PINGRESP
+            sock.readinto(hdr, 1)
+            return None
+        if op & 0xF0 != 0x30:
+            return op
+        
+        # 剩余长度（变长编码）
+        sz = 0
+        shift = 0
+        while True:
+            sock.readinto(hdr, 1)
+            sz |= (hdr[0] & 0x7F) << shift
+            if not hdr[0] & 0x80:
+                break
+            shift += 7
+        
+        # 主题、报文标识符（QoS > 0 时）、消息依次排列
+        sock.readinto(hdr, 2)
+        topic_len = (hdr[0] << 8) | hdr[1]
+        sz -= topic_len + 2
+        if op & 6:
+            sz -= 2
+        
+        if topic_len + sz <= len(self._rx_buf):
+            mv = self._rx_mv
+            sock.readinto(self._rx_buf, topic_len)
+            if op & 6:
+                sock.readinto(hdr, 2)
+            end = topic_len + sz
+            sock.readinto(mv[topic_len:end], sz)
+            topic = mv[:topic_len]
+            msg = mv[topic_len:end]
+        else:
+            topic = sock.read(topic_len)
+            if op & 6:
+                sock.readinto(hdr, 2)
+            msg = sock.read(sz)
+        
+        callback = self._cb
+        if callback is not None:
+            callback(topic, msg)
+        
+        if op & 6 == 2:
+            # QoS 1：回复 PUBACK（报文标识符还在 hdr 中）
+            ack = self._rx_ack
+            ack[2] = hdr[0]
+            ack[3] = hdr[1]
+            sock.write(ack)
+        elif op & 6 == 4:
+            raise MQTTException("不支持 QoS 2 消息")
+        return op
+    
+    def _poll_msg(self, blocking):
+        """读取一个报文：启用接收缓冲区时用 _read_msg，否则交给 umqtt"""
+        if self._rx_buf is not None:
+            self._read_msg(blocking)
+        elif blocking:
+            self.client.wait_msg()
+        else:
+            self.client.check_msg()
+    
+    def set_callback_once(self, callback):
+        """
+        设置订阅消息回调（初始化时调用一次即可，之后 subscribe 不必再传回调）
+        
+        umqtt 客户端上只安装一次内部分发函数，更换回调只替换引用
+        
+        Args:
+            callback: 回调函数 callback(topic, msg)，topic 和 msg 均为 bytes
+        """
+        self._cb = callback
+        if not self._cb_installed:
+            self.client.set_callback(self._on_message)
+            self._cb_installed = True
     
     def subscribe(self, topic, callback=None):
         """
@@ -167,26 +706,29 @@ class MQTTClientManager:
         
         Args:
             topic: 主题
-            callback: 回调函数（可选）
+            callback: 回调函数 callback(topic, msg)（可选），topic 和 msg 均为 bytes；
+                      启用 rx_bufsize 时 check_msg / wait_msg 收到的消息以指向接收缓冲区的
+                      memoryview 传入，只在回调期间有效，需要解码或保留时先 bytes(msg)
             
         Returns:
             bool: 订阅成功返回 True，失败返回 False
         """
         try:
-            if not self.is_connected_flag or not self.client:
+            if not self._sock_ready():
                 self._log("MQTT 未连接，无法订阅主题", is_error=True)
                 return False
             
-            if callback:
-                self.client.set_callback(callback)
+            # 回调与当前的相同且已安装（例如重新订阅刷新会话）时不再重复设置
+            if callback is not None and (callback is not self._cb or not self._cb_installed):
+                self.set_callback_once(callback)
             
             self.client.subscribe(topic)
             self._log(f"已订阅 MQTT 主题: {topic}")
             return True
             
-        except Exception as e:
-            self.error_count += 1
-            self._log(f"MQTT 订阅失败: {type(e).__name__} - {e}", is_error=True)
+        except _NET_ERRORS as e:
+            self._c[MQTT_ERRORS] += 1
+            self._log(_SUBSCRIBE_ERR_FMT.format(type(e).__name__, e), is_error=True)
             return False
     
     def check_msg(self):
@@ -197,11 +739,11 @@ class MQTTClientManager:
             bool: 处理成功返回 True
         """
         try:
-            if self.client:
-                self.client.check_msg()
+            if self._sock_ready():
+                self._poll_msg(False)
                 return True
-        except Exception as e:
-            self._log(f"MQTT 消息检查失败: {e}", is_error=True)
+        except _NET_ERRORS as e:
+            self._log(_CHECK_ERR_FMT.format(type(e).__name__, e), is_error=True)
             return False
     
     def wait_msg(self):
@@ -212,11 +754,32 @@ class MQTTClientManager:
             bool: 处理成功返回 True
         """
         try:
-            if self.client:
-                self.client.wait_msg()
+            if self._sock_ready():
+                self._poll_msg(True)
                 return True
-        except Exception as e:
-            self._log(f"MQTT 消息等待失败: {e}", is_error=True)
+        except _NET_ERRORS as e:
+            self._log(_WAIT_ERR_FMT.format(type(e).__name__, e), is_error=True)
+            return False
+    
+    def ping(self):
+        """
+        发送心跳包检查长连接是否仍然可用（同时读取之前心跳的响应）
+        
+        Returns:
+            bool: 连接可用返回 True，连接已断开返回 False
+        """
+        if not self._sock_ready():
+            return False
+        
+        try:
+            self.client.ping()
+            # 非阻塞读取已到达的 PINGRESP，socket 已关闭时会抛出 OSError
+            self._poll_msg(False)
+            return True
+        except _NET_ERRORS as e:
+            self._c[MQTT_ERRORS] += 1
+            self.is_connected_flag = False
+            self._log(_PING_ERR_FMT.format(type(e).__name__, e))
             return False
     
     def is_connected(self):
@@ -233,19 +796,24 @@ class MQTTClientManager:
         获取统计信息
         
         Returns:
-            dict: 连接次数、发布次数、错误次数
+            dict: 连接次数、发布次数、错误次数、待发送 / 已丢弃消息数
         """
+        c = self._c
         return {
-            'connects': self.connect_count,
-            'publishes': self.publish_count,
-            'errors': self.error_count
+            'connects': c[MQTT_CONNECTS],
+            'publishes': c[MQTT_PUBLISHES],
+            'errors': c[MQTT_ERRORS],
+            'pending': self._pending_count,
+            'dropped': self.dropped_count
         }
     
     def reset_statistics(self):
         """重置统计信息"""
-        self.connect_count = 0
-        self.publish_count = 0
-        self.error_count = 0
+        c = self._c
+        c[MQTT_CONNECTS] = 0
+        c[MQTT_PUBLISHES] = 0
+        c[MQTT_ERRORS] = 0
+        self.dropped_count = 0
     
     def cleanup(self):
         """
@@ -262,19 +830,20 @@ class MQTTClientManager:
         except Exception as e:
             print(f"MQTT 清理异常: {e}")
     
-    def reconnect(self, retry_count=3):
+    def reconnect(self, retry_count=3, watchdog_feed_callback=None):
         """
         重新连接到 MQTT 服务器
         
         Args:
             retry_count: 重试次数
+            watchdog_feed_callback: 看门狗喂狗回调函数（可选）
             
         Returns:
             bool: 重连成功返回 True
         """
         self._log("尝试重新连接 MQTT...")
         self.disconnect()
-        return self.connect(retry_count=retry_count)
+        return self.connect(retry_count=retry_count, watchdog_feed_callback=watchdog_feed_callback)
 
 
 # ==================== 便捷函数 ====================
@@ -5,11 +5,47 @@
 
 import time
 import network, ubinascii
+import urandom
+from machine import RTC
+
+try:
+    import ntptime
+except ImportError:
+    ntptime = None
+
+# 时间格式模板（模块加载时创建一次，各方法共用）
+_FMT_ISO = "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}"       # YYYY-MM-DDTHH:MM:SS
+_FMT_ISO_Z = _FMT_ISO + "Z"                                  # UTC 时间
+_FMT_DATETIME = "{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}"  # format_time 默认格式
+
+
+def _sleep_with_feed(seconds, watchdog_feed_callback=None, feed_interval_ms=5000):
+    """
+    分段睡眠，每段结束时喂狗（长时间等待时避免看门狗超时）
+    
+    Args:
+        seconds: 睡眠时间（秒，可为小数）
+        watchdog_feed_callback: 看门狗喂狗回调函数（可选）
+        feed_interval_ms: 喂狗间隔（毫秒），需小于看门狗超时时间
+    """
+    remaining_ms = int(seconds * 1000)
+    while remaining_ms > 0:
+        step_ms = min(feed_interval_ms, remaining_ms)
+        time.sleep_ms(step_ms)
+        remaining_ms -= step_ms
+        if watchdog_feed_callback:
+            watchdog_feed_callback()
 
 
 class WiFiManager:
     """WiFi 连接管理器"""
     
+    # 等待连接时的轮询参数（毫秒）
+    POLL_MIN_MS = 50            # 初始轮询间隔
+    POLL_MAX_MS = 500           # 最大轮询间隔
+    FEED_INTERVAL_MS = 500      # 喂狗间隔
+    REPORT_INTERVAL_MS = 2000   # “等待连接...”提示间隔
+    
     def __init__(self, ssid, password):
         """
         初始化 WiFi 管理器
@@ -35,35 +71,55 @@ class WiFiManager:
         """
         print(f"启动 WiFi 连接程序到 {self.ssid}")
         try:
-            self.wlan = network.WLAN(network.STA_IF)
-            self.wlan.config(pm=network.WLAN.PM_NONE)  # 禁用电源管理
-            self.wlan.active(True)
+            wlan = network.WLAN(network.STA_IF)
+            self.wlan = wlan
+            wlan.config(pm=network.WLAN.PM_NONE)  # 禁用电源管理
+            wlan.active(True)
+            
+            # 等待循环中反复调用，先绑定到局部变量
+            isconn = wlan.isconnected
+            status = wlan.status
+            wrong_password = getattr(network, "STAT_WRONG_PASSWORD", None)
             
             # 如果已经连接，直接返回
-            if self.wlan.isconnected():
-                print(f"已连接到 WiFi: {self.wlan.ifconfig()[0]}")
+            if isconn():
+                print(f"已连接到 WiFi: {wlan.ifconfig()[0]}")
                 return True
             
             # 开始连接
             print(f"正在连接到 WiFi: {self.ssid}")
-            self.wlan.connect(self.ssid, self.password)
+            wlan.connect(self.ssid, self.password)
             
-            # 等待连接（每秒喂狗）
-            start_time = time.time()
-            while not self.wlan.isconnected():
-                if time.time() - start_time > timeout:
+            # 等待连接：轮询间隔从 50ms 开始逐步加倍（最长 500ms），连接建立后能尽快返回
+            # 超时计算使用单调的 ticks_ms，不受 NTP 校时导致的 time.time() 跳变影响
+            timeout_ms = timeout * 1000
+            delay_ms = self.POLL_MIN_MS
+            start_ms = last_feed_ms = last_report_ms = time.ticks_ms()
+            while not isconn():
+                now_ms = time.ticks_ms()
+                if time.ticks_diff(now_ms, start_ms) > timeout_ms:
                     print(f"WiFi 连接超时（{timeout}秒）")
                     return False
                 
-                # 喂狗（如果提供了回调函数）
-                if watchdog_feed_callback:
+                # 密码错误不会自行恢复，不必等到超时
+                if status() == wrong_password:
+                    print("WiFi 连接失败: 密码错误")
+                    return False
+                
+                # 喂狗（如果提供了回调函数），距上次喂狗超过喂狗间隔才调用
+                if watchdog_feed_callback and time.ticks_diff(now_ms, last_feed_ms) > self.FEED_INTERVAL_MS:
                     watchdog_feed_callback()
+                    last_feed_ms = now_ms
                 
-                print("等待连接...")
-                time.sleep(2)
+                if time.ticks_diff(now_ms, last_report_ms) >= self.REPORT_INTERVAL_MS:
+                    print("等待连接...")
+                    last_report_ms = now_ms
+                
+                time.sleep_ms(delay_ms)
+                delay_ms = min(self.POLL_MAX_MS, delay_ms * 2)
             
             # 连接成功
-            ip_address = self.wlan.ifconfig()[0]
+            ip_address = wlan.ifconfig()[0]
             print(f"WiFi 连接成功！IP 地址: {ip_address}")
             return True
             
@@ -73,9 +129,10 @@ class WiFiManager:
     
     def disconnect(self):
         """断开 WiFi 连接"""
-        if self.wlan and self.wlan.isconnected():
-            self.wlan.disconnect()
-            self.wlan.active(False)
+        wlan = self.wlan
+        if wlan and wlan.isconnected():
+            wlan.disconnect()
+            wlan.active(False)
             print("WiFi 已断开")
     
     def is_connected(self):
@@ -85,7 +142,8 @@ class WiFiManager:
         Returns:
             bool: 已连接返回 True，否则返回 False
         """
-        return self.wlan and self.wlan.isconnected()
+        wlan = self.wlan
+        return wlan and wlan.isconnected()
     
     def get_ip_address(self):
         """
@@ -94,9 +152,10 @@ class WiFiManager:
         Returns:
             str: IP 地址，未连接返回 None
         """
-        if self.is_connected():
-            return self.wlan.ifconfig()[0]
-        return None
+        wlan = self.wlan
+        if not (wlan and wlan.isconnected()):
+            return None
+        return wlan.ifconfig()[0]
     
     def get_network_info(self):
         """
@@ -105,17 +164,31 @@ class WiFiManager:
         Returns:
             dict: 包含 IP、子网掩码、网关、DNS 的字典
         """
-        if self.is_connected():
-            ifconfig = self.wlan.ifconfig()
-            return {
-                'ip': ifconfig[0],
-                'subnet':  ifconfig[1],
-                'gateway': ifconfig[2],
-                'dns': ifconfig[3],
-                'rssi': self.wlan.status('rssi'),
-                'mac': ubinascii.hexlify(self.wlan.config('mac'), ':').decode()
-            }
-        return None
+        wlan = self.wlan
+        if not (wlan and wlan.isconnected()):
+            return None
+        # ifconfig() 每次调用都会新建元组，只调用一次并解包
+        ip, subnet, gateway, dns = wlan.ifconfig()
+        return {
+            'ip': ip,
+            'subnet':  subnet,
+            'gateway': gateway,
+            'dns': dns,
+            'rssi': wlan.status('rssi'),
+            'mac': ubinascii.hexlify(wlan.config('mac'), ':').decode()
+        }
+    
+    def get_rssi(self):
+        """
+        获取当前信号强度
+        
+        Returns:
+            int: RSSI（dBm），未连接时返回 None
+        """
+        wlan = self.wlan
+        if not (wlan and wlan.isconnected()):
+            return None
+        return wlan.status('rssi')
     
     def cleanup(self):
         """
@@ -143,6 +216,13 @@ class NTPTimeSync:
         "pool.ntp.org",         # 国际 NTP 池
     ]
     
+    # format_time 默认格式（对应模板 _FMT_DATETIME，一次 format 完成）
+    DEFAULT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+    
+    # 同步失败重试的指数退避参数（秒）
+    BACKOFF_BASE = 5    # 首次重试等待时间
+    BACKOFF_CAP = 600   # 最大等待时间
+    
     def __init__(self, timezone_offset=8):
         """
         初始化 NTP 时间同步器
@@ -151,35 +231,71 @@ class NTPTimeSync:
             timezone_offset: 时区偏移量（小时），默认 8（北京时间 UTC+8）
         """
         self.timezone_offset = timezone_offset
+        self._rtc = RTC()
+        
+        # 时区后缀只和 timezone_offset 有关，预先生成 ISO 8601 格式模板
+        self._tz_offset_seconds = int(timezone_offset * 3600)
+        self._iso_fmt = self._build_iso_fmt(self._tz_offset_seconds)
+        self._backoff = 0  # 当前服务器连续同步失败次数，用于计算退避时间，同步成功后清零
+        
+        # 服务器顺序只打乱一次（Fisher-Yates），避免所有设备都先请求同一个服务器
+        servers = list(self.NTP_SERVERS)
+        for i in range(len(servers) - 1, 0, -1):
+            j = urandom.getrandbits(8) % (i + 1)
+            servers[i], servers[j] = servers[j], servers[i]
+        self._servers = servers
+        self._last_ok = None  # 上次同步成功的服务器，下次优先使用
+    
+    def _next_backoff_delay(self):
+        """
+        计算下一次重试前的等待时间：指数退避（封顶 BACKOFF_CAP）并加入 0.5~1.5 倍的随机抖动
+        
+        Returns:
+            float: 等待时间（秒）
+        """
+        delay = min(self.BACKOFF_CAP, self.BACKOFF_BASE * (1 << self._backoff))
+        self._backoff += 1
+        return urandom.getrandbits(16) / 65535 * delay + delay * 0.5
     
-    def sync(self, ntp_server=None, retry_count=3):
+    def sync(self, ntp_server=None, retry_count=3, watchdog_feed_callback=None):
         """
         从 NTP 服务器同步时间
         
         Args:
             ntp_server:  NTP 服务器地址，默认使用服务器列表
             retry_count: 重试次数，默认 3 次
+            watchdog_feed_callback: 看门狗喂狗回调函数（可选），重试等待期间定期调用
             
         Returns: 
             bool: 同步成功返回 True，失败返回 False
         """
+        if ntptime is None:
+            print("错误:  ntptime 模块不可用")
+            return False
+        
         try:
-            import ntptime
-            from machine import RTC
+            # 确定要使用的 NTP 服务器（上次成功的服务器排在最前面）
+            last_ok = self._last_ok
+            if ntp_server:
+                servers = [ntp_server]
+            elif last_ok:
+                servers = [last_ok] + [s for s in self._servers if s != last_ok]
+            else:
+                servers = self._servers
             
-            # 确定要使用的 NTP 服务器
-            servers = [ntp_server] if ntp_server else self.NTP_SERVERS
-            
-            # 尝试每个服务器
+            # 尝试每个服务器（换服务器时不等待，退避从头开始）
             for server in servers:
+                self._backoff = 0
                 for attempt in range(retry_count):
                     try:
                         print(f"正在从 {server} 同步时间...  (尝试 {attempt + 1}/{retry_count})")
                         ntptime.host = server
                         ntptime.settime()
                         
-                        # 同步成功，调整时区
+                        # 同步成功，调整时区，并重置退避计数
                         self._adjust_timezone()
+                        self._backoff = 0
+                        self._last_ok = server
                         
                         current_time = self. get_iso8601_time()
                         print(f"时间同步成功: {current_time}")
@@ -187,16 +303,16 @@ class NTPTimeSync:
                         
                     except Exception as e: 
                         print(f"同步失败: {e}")
+                        # 同一服务器的最后一次尝试之后不再等待，直接换下一个服务器
                         if attempt < retry_count - 1:
-                            time.sleep(2)  # 重试前等待
+                            delay = self._next_backoff_delay()
+                            print(f"{delay:.1f} 秒后重试")
+                            _sleep_with_feed(delay, watchdog_feed_callback)
                         continue
             
             print("所有 NTP 服务器同步失败")
             return False
             
-        except ImportError:
-            print("错误:  ntptime 模块不可用")
-            return False
         except Exception as e:
             print(f"时间同步异常: {e}")
             return False
@@ -204,14 +320,11 @@ class NTPTimeSync:
     def _adjust_timezone(self):
         """调整系统时间到指定时区"""
         try: 
-            from machine import RTC
-            
-            rtc = RTC()
             utc_timestamp = time.mktime(time.localtime())
             local_timestamp = utc_timestamp + self.timezone_offset * 3600
             local_time = time.localtime(local_timestamp)
             
-            rtc.datetime((
+            self._rtc.datetime((
                 local_time[0],  # 年
                 local_time[1],  # 月
                 local_time[2],  # 日
@@ -225,18 +338,26 @@ class NTPTimeSync:
         except Exception as e:
             print(f"时区调整失败: {e}")
     
+    @staticmethod
+    def _build_iso_fmt(offset_seconds):
+        """
+        生成带时区后缀的 ISO 8601 格式模板
+        
+        Args:
+            offset_seconds: 时区偏移（秒）
+            
+        Returns:
+            str: 如 "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}+08:00"
+        """
+        offset_sign = '+' if offset_seconds >= 0 else '-'
+        offset_abs = abs(offset_seconds)
+        tz_suffix = "{}{:02d}:{:02d}".format(offset_sign, offset_abs // 3600, offset_abs % 3600 // 60)
+        return _FMT_ISO + tz_suffix
+    
     def get_iso8601_time_local(self):
         """获取本地时间的 ISO 8601 格式（带时区偏移）"""
         t = time.localtime()
-        # 计算时区偏移的小时和分钟
-        offset_hours = self.timezone_offset // 3600
-        offset_minutes = abs(self.timezone_offset % 3600) // 60
-        offset_sign = '+' if offset_hours >= 0 else '-'
-        
-        return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}{}{:02d}:{:02d}". format(
-            t[0], t[1], t[2], t[3], t[4], t[5],
-            offset_sign, abs(offset_hours), offset_minutes
-        )
+        return self._iso_fmt.format(t[0], t[1], t[2], t[3], t[4], t[5])
     
     def get_iso8601_time_with_timezone(self, timezone_offset = 8 * 3600):
         """
@@ -247,16 +368,14 @@ class NTPTimeSync:
         # 获取当前本地时间
         t = time.localtime()
         
-        # 计算时区偏移的小时和分钟
-        offset_hours = timezone_offset // 3600
-        offset_minutes = abs(timezone_offset % 3600) // 60
-        offset_sign = '+' if offset_hours >= 0 else '-'
+        # 与初始化时的时区一致时直接使用预先生成的模板
+        if timezone_offset == self._tz_offset_seconds:
+            iso_fmt = self._iso_fmt
+        else:
+            iso_fmt = self._build_iso_fmt(timezone_offset)
         
         # 格式化为 ISO 8601 带时区偏移
-        return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}{}{:02d}:{:02d}".format(
-            t[0], t[1], t[2], t[3], t[4], t[5],
-            offset_sign, abs(offset_hours), offset_minutes
-        )
+        return iso_fmt.format(t[0], t[1], t[2], t[3], t[4], t[5])
     
     @staticmethod
     def get_iso8601_time():
@@ -266,18 +385,8 @@ class NTPTimeSync:
         Returns:
             str: ISO 8601 格式时间 (YYYY-MM-DDTHH:MM:SS)
         """
-        current_time = time.localtime()
-        
-        iso8601_time = "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}".format(
-            current_time[0],  # 年
-            current_time[1],  # 月
-            current_time[2],  # 日
-            current_time[3],  # 时
-            current_time[4],  # 分
-            current_time[5]   # 秒
-        )
-        
-        return iso8601_time
+        t = time.localtime()
+        return _FMT_ISO.format(t[0], t[1], t[2], t[3], t[4], t[5])
     
     @staticmethod
     def get_timestamp():
@@ -300,12 +409,10 @@ class NTPTimeSync:
     
         # 减去时区偏移，得到 UTC 时间
         t = time.gmtime(local_time - timezone_offset)  # 使用 gmtime() 获取 UTC 时间
-        return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}Z".format(
-            t[0], t[1], t[2], t[3], t[4], t[5]
-        )
+        return _FMT_ISO_Z.format(t[0], t[1], t[2], t[3], t[4], t[5])
     
     @staticmethod
-    def format_time(format_str="%Y-%m-%d %H:%M:%S"):
+    def format_time(format_str=DEFAULT_TIME_FORMAT):
         """
         格式化当前时间
         
@@ -317,7 +424,14 @@ class NTPTimeSync:
         """
         current_time = time.localtime()
         
-        # MicroPython 不支持 strftime，手动格式化
+        # 默认格式走快速路径，一次 format 完成
+        if format_str == NTPTimeSync.DEFAULT_TIME_FORMAT:
+            return _FMT_DATETIME.format(
+                current_time[0], current_time[1], current_time[2],
+                current_time[3], current_time[4], current_time[5]
+            )
+        
+        # MicroPython 不支持 strftime，其他格式手动替换
         formatted_time = format_str.replace("%Y", "{:04d}".format(current_time[0]))
         formatted_time = formatted_time.replace("%m", "{:02d}".format(current_time[1]))
         formatted_time = formatted_time.replace("%d", "{:02d}".format(current_time[2]))
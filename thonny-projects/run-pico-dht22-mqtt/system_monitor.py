@@ -3,15 +3,101 @@
 用于记录和跟踪 Raspberry Pi Pico W 的系统状态
 """
 
-import time
-import gc
-import sys
-import os
+import array
+from micropython import const
+# 热路径上用到的函数直接绑定为模块级名字，省去每次对 gc / time 模块的属性查找
+from gc import collect as _collect, mem_free as _mem_free, mem_alloc as _mem_alloc
+from time import ticks_ms as _ticks_ms, ticks_diff as _ticks_diff, ticks_add as _ticks_add
+
+
+# 计数器数组下标
+# 前三项与 mqtt_client 的 MQTT_CONNECTS / MQTT_PUBLISHES / MQTT_ERRORS 一致，
+# 数组通过 counters 共享给 MQTTClientManager 后由它直接累加
+_C_MQTT_CONNECTS = const(0)     # MQTT 连接次数
+_C_MQTT_PUBLISHES = const(1)    # MQTT 发布次数
+_C_MQTT_FAILURES = const(2)     # MQTT 失败次数
+_C_TOTAL_LOOPS = const(3)       # 总循环次数
+_C_SUCCESS_LOOPS = const(4)     # 成功的循环次数
+_C_FAILED_LOOPS = const(5)      # 失败的循环次数
+_C_CONSEC_FAIL = const(6)       # 连续失败次数
+_C_MAX_CONSEC_FAIL = const(7)   # 最大连续失败次数
+_C_WIFI_CONNECTS = const(8)     # WiFi 连接次数
+_C_WIFI_RECONNECTS = const(9)   # WiFi 重连次数
+_C_WIFI_FAILURES = const(10)    # WiFi 失败次数
+_C_SENSOR_READS = const(11)     # 传感器读取次数
+_C_SENSOR_ERRORS = const(12)    # 传感器错误次数
+_C_WDT_FEEDS = const(13)        # 喂狗次数
+_C_WDT_RESETS = const(14)       # 看门狗重置次数
+_C_COUNT = const(15)
+
+
+# 运行时间格式化用的单位（秒数, 名称），从大到小
+_UPTIME_UNITS = ((86400, "天"), (3600, "小时"), (60, "分钟"), (1, "秒"))
+
+# stats_to_json() 的扁平 JSON 键片段，顺序与 _C_* 计数器下标一致
+_JSON_COUNTER_KEYS = (
+    b'{"mqtt_connects":',
+    b',"mqtt_publishes":',
+    b',"mqtt_failures":',
+    b',"total_loops":',
+    b',"successful_loops":',
+    b',"failed_loops":',
+    b',"consecutive_failures":',
+    b',"max_consecutive_failures":',
+    b',"wifi_connects":',
+    b',"wifi_reconnects":',
+    b',"wifi_failures":',
+    b',"sensor_reads":',
+    b',"sensor_errors":',
+    b',"watchdog_feeds":',
+    b',"watchdog_resets":',
+)
+_JSON_UPTIME_KEY = b',"uptime_seconds":'
+_JSON_MEM_FREE_KEY = b',"mem_free":'
+_JSON_MEM_ALLOC_KEY = b',"mem_alloc":'
+
+
+def _write_bytes(buf, n, data):
+    """把 data 写入 buf[n:]，返回写入后的位置"""
+    end = n + len(data)
+    buf[n:end] = data
+    return end
+
+
+def _write_uint(buf, n, value):
+    """
+    把非负整数按十进制写入 buf[n:]（不创建临时字符串），返回写入后的位置
+    """
+    if value == 0:
+        buf[n] = 0x30  # '0'
+        return n + 1
+    # 先数出位数，再从低位往高位倒着写
+    digits = 0
+    v = value
+    while v:
+        v //= 10
+        digits += 1
+    end = n + digits
+    i = end
+    while value:
+        i -= 1
+        buf[i] = 0x30 + value % 10
+        value //= 10
+    return end
 
 
 class SystemMonitor:
     """系统状态监控类"""
     
+    # 两次垃圾回收之间的最小间隔（毫秒），避免每次查询内存都遍历整个堆
+    GC_MIN_INTERVAL_MS = 5000
+    # 运行时间累计阈值（毫秒）：ticks_diff 只在 ±2^29 ms 内有效，超过该阈值就把已过时间并入秒数累计
+    UPTIME_FOLD_MS = 1 << 28
+    # stats_to_json() 输出的最大长度（字节），所有数值取 10 位十进制时也能放下
+    STATS_JSON_SIZE = 512
+    # Flash 信息缓存有效期（毫秒），存储用量变化很慢，不必每次都 statvfs
+    FLASH_CACHE_TTL_MS = 60000
+    
     def __init__(self, logger=None):
         """
         初始化系统监控器
@@ -21,40 +107,122 @@ class SystemMonitor:
         """
         self.logger = logger
         
-        # 系统启动时间
-        self.start_time = time.time()
-        
-        # 统计信息
-        self.total_loops = 0          # 总循环次数
-        self.successful_loops = 0     # 成功的循环次数
-        self.failed_loops = 0         # 失败的循环次数
-        self.consecutive_failures = 0 # 连续失败次数
-        self.max_consecutive_failures = 0  # 最大连续失败次数
-        
-        # WiFi 统计
-        self.wifi_connects = 0        # WiFi 连接次数
-        self.wifi_reconnects = 0      # WiFi 重连次数
-        self.wifi_failures = 0        # WiFi 失败次数
+        # 系统启动时间（ticks_ms），以及已并入累计的运行秒数
+        self.start_ticks = _ticks_ms()
+        self._uptime_accum_s = 0
         
-        # MQTT 统计
-        self.mqtt_connects = 0        # MQTT 连接次数
-        self.mqtt_publishes = 0       # MQTT 发布次数
-        self.mqtt_failures = 0        # MQTT 失败次数
-        
-        # 传感器统计
-        self.sensor_reads = 0         # 传感器读取次数
-        self.sensor_errors = 0        # 传感器错误次数
+        # 计数器（循环 / WiFi / MQTT / 传感器 / 看门狗）放在一个数组里，按 _C_* 下标访问
+        self._c = array.array('I', bytes(4 * _C_COUNT))
         
         # 内存统计
         self.min_free_memory = None   # 最小可用内存
         self.max_free_memory = None   # 最大可用内存
-        
-        # 看门狗统计
-        self.watchdog_feeds = 0       # 喂狗次数
-        self.watchdog_resets = 0      # 看门狗重置次数
-        
-        # 最后一次状态检查时间
-        self.last_check_time = time.time()
+        self._last_gc_ms = None       # 上次垃圾回收的时间（ticks_ms）
+        
+        # Flash 信息缓存
+        self._flash_cache = None
+        self._flash_cache_ms = 0
+        
+        # 最后一次状态检查时间（ticks_ms）
+        self.last_check_ticks = self.start_ticks
+        
+        # get_statistics() 返回的字典骨架：只分配一次，之后每次原地更新数值
+        self._stats = {
+            'uptime': '',
+            'uptime_seconds': 0,
+            'total_loops': 0,
+            'successful_loops': 0,
+            'failed_loops': 0,
+            'success_rate': 0.0,
+            'consecutive_failures': 0,
+            'max_consecutive_failures': 0,
+            'wifi': {'connects': 0, 'reconnects': 0, 'failures': 0, 'success_rate': 0.0},
+            'mqtt': {'connects': 0, 'publishes': 0, 'failures': 0, 'success_rate': 0.0},
+            'sensor': {'reads': 0, 'errors': 0, 'success_rate': 0.0},
+            'memory': {'free_kb': 0, 'allocated_kb': 0, 'usage_percent': 0.0, 'min_free_kb': 0, 'max_free_kb': 0},
+            'flash': {'total_kb': 0, 'used_kb': 0, 'free_kb': 0, 'usage_percent': 0.0},
+            'watchdog': {'feeds': 0, 'resets': 0}
+        }
+    
+    @property
+    def counters(self):
+        """计数器数组（可传给 MQTTClientManager(counters=...) 共享 MQTT 统计）"""
+        return self._c
+    
+    @property
+    def total_loops(self):
+        """总循环次数"""
+        return self._c[_C_TOTAL_LOOPS]
+    
+    @property
+    def successful_loops(self):
+        """成功的循环次数"""
+        return self._c[_C_SUCCESS_LOOPS]
+    
+    @property
+    def failed_loops(self):
+        """失败的循环次数"""
+        return self._c[_C_FAILED_LOOPS]
+    
+    @property
+    def consecutive_failures(self):
+        """连续失败次数"""
+        return self._c[_C_CONSEC_FAIL]
+    
+    @property
+    def max_consecutive_failures(self):
+        """最大连续失败次数"""
+        return self._c[_C_MAX_CONSEC_FAIL]
+    
+    @property
+    def wifi_connects(self):
+        """WiFi 连接次数"""
+        return self._c[_C_WIFI_CONNECTS]
+    
+    @property
+    def wifi_reconnects(self):
+        """WiFi 重连次数"""
+        return self._c[_C_WIFI_RECONNECTS]
+    
+    @property
+    def wifi_failures(self):
+        """WiFi 失败次数"""
+        return self._c[_C_WIFI_FAILURES]
+    
+    @property
+    def mqtt_connects(self):
+        """MQTT 连接次数"""
+        return self._c[_C_MQTT_CONNECTS]
+    
+    @property
+    def mqtt_publishes(self):
+        """MQTT 发布次数"""
+        return self._c[_C_MQTT_PUBLISHES]
+    
+    @property
+    def mqtt_failures(self):
+        """MQTT 失败次数"""
+        return self._c[_C_MQTT_FAILURES]
+    
+    @property
+    def sensor_reads(self):
+        """传感器读取次数"""
+        return self._c[_C_SENSOR_READS]
+    
+    @property
+    def sensor_errors(self):
+        """传感器错误次数"""
+        return self._c[_C_SENSOR_ERRORS]
+    
+    @property
+    def watchdog_feeds(self):
+        """喂狗次数"""
+        return self._c[_C_WDT_FEEDS]
+    
+    @property
+    def watchdog_resets(self):
+        """看门狗重置次数"""
+        return self._c[_C_WDT_RESETS]
     
     def _log(self, message, is_error=False):
         """内部日志方法"""
@@ -73,7 +241,14 @@ class SystemMonitor:
         Returns:
             int: 运行时间（秒）
         """
-        return int(time.time() - self.start_time)
+        delta = _ticks_diff(_ticks_ms(), self.start_ticks)
+        if delta >= self.UPTIME_FOLD_MS:
+            # 把整秒部分并入累计，起点随之前移，避免 ticks 回绕后差值失效
+            seconds = delta // 1000
+            self._uptime_accum_s += seconds
+            self.start_ticks = _ticks_add(self.start_ticks, seconds * 1000)
+            delta -= seconds * 1000
+        return self._uptime_accum_s + delta // 1000
     
     def get_uptime_formatted(self):
         """
@@ -82,35 +257,33 @@ class SystemMonitor:
         Returns:
             str: 格式化的运行时间字符串 (例如: "2天3小时45分钟")
         """
-        uptime_seconds = self.get_uptime()
-        
-        days = uptime_seconds // 86400
-        hours = (uptime_seconds % 86400) // 3600
-        minutes = (uptime_seconds % 3600) // 60
-        seconds = uptime_seconds % 60
-        
+        rem = self.get_uptime()
         parts = []
-        if days > 0:
-            parts.append(f"{days}天")
-        if hours > 0:
-            parts.append(f"{hours}小时")
-        if minutes > 0:
-            parts.append(f"{minutes}分钟")
-        if seconds > 0 or not parts:
-            parts.append(f"{seconds}秒")
+        for unit, label in _UPTIME_UNITS:
+            q, rem = divmod(rem, unit)
+            # 省略为 0 的单位，全部为 0 时保留 "0秒"
+            if q or (unit == 1 and not parts):
+                parts.append(str(q))
+                parts.append(label)
         
         return "".join(parts)
     
-    def get_memory_info(self):
+    def get_memory_info(self, force_gc=False):
         """
         获取内存信息
         
+        Args:
+            force_gc: 是否强制先进行垃圾回收，默认 False（距上次回收超过 GC_MIN_INTERVAL_MS 才回收）
+        
         Returns:
             dict: 包含内存使用情况的字典
         """
-        gc.collect()  # 先触发垃圾回收
-        free_memory = gc.mem_free()
-        allocated_memory = gc.mem_alloc()
+        now = _ticks_ms()
+        if force_gc or self._last_gc_ms is None or _ticks_diff(now, self._last_gc_ms) >= self.GC_MIN_INTERVAL_MS:
+            _collect()
+            self._last_gc_ms = now
+        free_memory = _mem_free()
+        allocated_memory = _mem_alloc()
         total_memory = free_memory + allocated_memory
         
         # 更新最小/最大可用内存
@@ -128,13 +301,23 @@ class SystemMonitor:
             'max_free': self.max_free_memory
         }
     
-    def get_flash_info(self):
+    def get_flash_info(self, force=False):
         """
-        获取 Flash 存储信息
+        获取 Flash 存储信息（结果缓存 FLASH_CACHE_TTL_MS 毫秒）
+        
+        Args:
+            force: 是否忽略缓存重新读取，默认 False
         
         Returns:
             dict: 包含存储使用情况的字典
         """
+        cache = self._flash_cache
+        if not force and cache and _ticks_diff(_ticks_ms(), self._flash_cache_ms) < self.FLASH_CACHE_TTL_MS:
+            return cache
+        
+        # 只有查询存储信息时才用到 os，延迟到这里导入
+        import os
+        
         try:
             # os.statvfs('/') 返回文件系统统计信息
             # 返回值: (f_bsize, f_frsize, f_blocks, f_bfree, f_bavail, f_files, f_ffree, f_favail, f_flag, f_namemax)
@@ -151,7 +334,8 @@ class SystemMonitor:
             free_size = block_size * free_blocks
             used_size = total_size - free_size
             
-            return {
+            # 只缓存读取成功的结果
+            self._flash_cache = {
                 'total': total_size,
                 'used': used_size,
                 'free': free_size,
@@ -160,6 +344,8 @@ class SystemMonitor:
                 'free_kb': free_size // 1024,
                 'usage_percent': (used_size / total_size * 100) if total_size > 0 else 0
             }
+            self._flash_cache_ms = _ticks_ms()
+            return self._flash_cache
         except Exception as e:
             return {
                 'total': 0,
@@ -174,60 +360,65 @@ class SystemMonitor:
     
     def record_loop_start(self):
         """记录循环开始"""
-        self.total_loops += 1
-        self.last_check_time = time.time()
+        self._c[_C_TOTAL_LOOPS] += 1
+        self.last_check_ticks = _ticks_ms()
+        # 主循环中定期调用，顺便累计运行时间，保证长时间不输出状态时也不会回绕
+        self.get_uptime()
     
     def record_loop_success(self):
         """记录循环成功"""
-        self.successful_loops += 1
-        self.consecutive_failures = 0
+        c = self._c
+        c[_C_SUCCESS_LOOPS] += 1
+        c[_C_CONSEC_FAIL] = 0
     
     def record_loop_failure(self):
         """记录循环失败"""
-        self.failed_loops += 1
-        self.consecutive_failures += 1
+        c = self._c
+        c[_C_FAILED_LOOPS] += 1
+        c[_C_CONSEC_FAIL] += 1
         
         # 更新最大连续失败次数
-        if self.consecutive_failures > self.max_consecutive_failures:
-            self.max_consecutive_failures = self.consecutive_failures
+        if c[_C_CONSEC_FAIL] > c[_C_MAX_CONSEC_FAIL]:
+            c[_C_MAX_CONSEC_FAIL] = c[_C_CONSEC_FAIL]
     
     def record_wifi_connect(self, is_reconnect=False):
         """记录 WiFi 连接"""
-        self.wifi_connects += 1
+        c = self._c
+        c[_C_WIFI_CONNECTS] += 1
         if is_reconnect:
-            self.wifi_reconnects += 1
+            c[_C_WIFI_RECONNECTS] += 1
     
     def record_wifi_failure(self):
         """记录 WiFi 失败"""
-        self.wifi_failures += 1
+        self._c[_C_WIFI_FAILURES] += 1
     
     def record_mqtt_connect(self):
-        """记录 MQTT 连接"""
-        self.mqtt_connects += 1
+        """记录 MQTT 连接（计数器已共享给 MQTTClientManager 时由它自动累加，无需调用）"""
+        self._c[_C_MQTT_CONNECTS] += 1
     
     def record_mqtt_publish(self):
-        """记录 MQTT 发布"""
-        self.mqtt_publishes += 1
+        """记录 MQTT 发布（计数器已共享给 MQTTClientManager 时由它自动累加，无需调用）"""
+        self._c[_C_MQTT_PUBLISHES] += 1
     
     def record_mqtt_failure(self):
-        """记录 MQTT 失败"""
-        self.mqtt_failures += 1
+        """记录 MQTT 失败（计数器已共享给 MQTTClientManager 时只需记录它内部捕获不到的异常）"""
+        self._c[_C_MQTT_FAILURES] += 1
     
     def record_sensor_read(self):
         """记录传感器读取"""
-        self.sensor_reads += 1
+        self._c[_C_SENSOR_READS] += 1
     
     def record_sensor_error(self):
         """记录传感器错误"""
-        self.sensor_errors += 1
+        self._c[_C_SENSOR_ERRORS] += 1
     
     def record_watchdog_feed(self):
         """记录喂狗操作"""
-        self.watchdog_feeds += 1
+        self._c[_C_WDT_FEEDS] += 1
     
     def record_watchdog_reset(self):
         """记录看门狗重置"""
-        self.watchdog_resets += 1
+        self._c[_C_WDT_RESETS] += 1
     
     def get_success_rate(self):
         """
@@ -236,9 +427,11 @@ class SystemMonitor:
         Returns:
             float: 成功率百分比
         """
-        if self.total_loops == 0:
+        c = self._c
+        total = c[_C_TOTAL_LOOPS]
+        if total == 0:
             return 0.0
-        return (self.successful_loops / self.total_loops) * 100
+        return (c[_C_SUCCESS_LOOPS] / total) * 100
     
     def get_wifi_success_rate(self):
         """
@@ -247,10 +440,12 @@ class SystemMonitor:
         Returns:
             float: WiFi 成功率百分比
         """
-        total = self.wifi_connects + self.wifi_failures
+        c = self._c
+        connects = c[_C_WIFI_CONNECTS]
+        total = connects + c[_C_WIFI_FAILURES]
         if total == 0:
             return 0.0
-        return (self.wifi_connects / total) * 100
+        return (connects / total) * 100
     
     def get_mqtt_success_rate(self):
         """
@@ -259,10 +454,12 @@ class SystemMonitor:
         Returns:
             float: MQTT 成功率百分比
         """
-        total = self.mqtt_publishes + self.mqtt_failures
+        c = self._c
+        publishes = c[_C_MQTT_PUBLISHES]
+        total = publishes + c[_C_MQTT_FAILURES]
         if total == 0:
             return 0.0
-        return (self.mqtt_publishes / total) * 100
+        return (publishes / total) * 100
     
     def get_sensor_success_rate(self):
         """
@@ -271,80 +468,157 @@ class SystemMonitor:
         Returns:
             float: 传感器成功率百分比
         """
-        if self.sensor_reads == 0:
+        c = self._c
+        reads = c[_C_SENSOR_READS]
+        if reads == 0:
             return 0.0
-        successful_reads = self.sensor_reads - self.sensor_errors
-        return (successful_reads / self.sensor_reads) * 100
+        successful_reads = reads - c[_C_SENSOR_ERRORS]
+        return (successful_reads / reads) * 100
     
     def get_statistics(self):
         """
         获取完整的统计信息
         
+        返回的是内部预分配的字典，每次调用原地更新，下次调用会覆盖其中的数值；
+        需要保留快照时请自行复制。成功率、使用率均为百分比数值（float），
+        格式化为文本请使用 format_statistics()
+        
         Returns:
             dict: 包含所有统计信息的字典
         """
         memory_info = self.get_memory_info()
         flash_info = self.get_flash_info()
         
-        return {
-            'uptime': self.get_uptime_formatted(),
-            'uptime_seconds': self.get_uptime(),
-            'total_loops': self.total_loops,
-            'successful_loops': self.successful_loops,
-            'failed_loops': self.failed_loops,
-            'success_rate': f"{self.get_success_rate():.1f}%",
-            'consecutive_failures': self.consecutive_failures,
-            'max_consecutive_failures': self.max_consecutive_failures,
-            'wifi': {
-                'connects': self.wifi_connects,
-                'reconnects': self.wifi_reconnects,
-                'failures': self.wifi_failures,
-                'success_rate': f"{self.get_wifi_success_rate():.1f}%"
-            },
-            'mqtt': {
-                'connects': self.mqtt_connects,
-                'publishes': self.mqtt_publishes,
-                'failures': self.mqtt_failures,
-                'success_rate': f"{self.get_mqtt_success_rate():.1f}%"
-            },
-            'sensor': {
-                'reads': self.sensor_reads,
-                'errors': self.sensor_errors,
-                'success_rate': f"{self.get_sensor_success_rate():.1f}%"
-            },
-            'memory': {
-                'free_kb': memory_info['free'] // 1024,
-                'allocated_kb': memory_info['allocated'] // 1024,
-                'usage_percent': f"{memory_info['usage_percent']:.1f}%",
-                'min_free_kb': memory_info['min_free'] // 1024 if memory_info['min_free'] else 0,
-                'max_free_kb': memory_info['max_free'] // 1024 if memory_info['max_free'] else 0
-            },
-            'flash': {
-                'total_kb': flash_info['total_kb'],
-                'used_kb': flash_info['used_kb'],
-                'free_kb': flash_info['free_kb'],
-                'usage_percent': f"{flash_info['usage_percent']:.1f}%"
-            },
-            'watchdog': {
-                'feeds': self.watchdog_feeds,
-                'resets': self.watchdog_resets
-            }
-        }
+        c = self._c
+        s = self._stats
+        s['uptime'] = self.get_uptime_formatted()
+        s['uptime_seconds'] = self.get_uptime()
+        s['total_loops'] = c[_C_TOTAL_LOOPS]
+        s['successful_loops'] = c[_C_SUCCESS_LOOPS]
+        s['failed_loops'] = c[_C_FAILED_LOOPS]
+        s['success_rate'] = self.get_success_rate()
+        s['consecutive_failures'] = c[_C_CONSEC_FAIL]
+        s['max_consecutive_failures'] = c[_C_MAX_CONSEC_FAIL]
+        
+        wifi = s['wifi']
+        wifi['connects'] = c[_C_WIFI_CONNECTS]
+        wifi['reconnects'] = c[_C_WIFI_RECONNECTS]
+        wifi['failures'] = c[_C_WIFI_FAILURES]
+        wifi['success_rate'] = self.get_wifi_success_rate()
+        
+        mqtt = s['mqtt']
+        mqtt['connects'] = c[_C_MQTT_CONNECTS]
+        mqtt['publishes'] = c[_C_MQTT_PUBLISHES]
+        mqtt['failures'] = c[_C_MQTT_FAILURES]
+        mqtt['success_rate'] = self.get_mqtt_success_rate()
+        
+        sensor = s['sensor']
+        sensor['reads'] = c[_C_SENSOR_READS]
+        sensor['errors'] = c[_C_SENSOR_ERRORS]
+        sensor['success_rate'] = self.get_sensor_success_rate()
+        
+        memory = s['memory']
+        memory['free_kb'] = memory_info['free'] // 1024
+        memory['allocated_kb'] = memory_info['allocated'] // 1024
+        memory['usage_percent'] = memory_info['usage_percent']
+        memory['min_free_kb'] = memory_info['min_free'] // 1024 if memory_info['min_free'] else 0
+        memory['max_free_kb'] = memory_info['max_free'] // 1024 if memory_info['max_free'] else 0
+        
+        flash = s['flash']
+        flash['total_kb'] = flash_info['total_kb']
+        flash['used_kb'] = flash_info['used_kb']
+        flash['free_kb'] = flash_info['free_kb']
+        flash['usage_percent'] = flash_info['usage_percent']
+        
+        watchdog = s['watchdog']
+        watchdog['feeds'] = c[_C_WDT_FEEDS]
+        watchdog['resets'] = c[_C_WDT_RESETS]
+        
+        return s
+    
+    def stats_to_json(self, buf):
+        """
+        把统计信息按固定的扁平结构直接编码为 JSON 写入 buf（键是预先准备好的字节串，只格式化数值）
+        
+        输出不含 Flash 信息（statvfs 开销较大）和成功率，需要时使用 get_statistics()
+        
+        Args:
+            buf: 可写缓冲区（bytearray），长度至少为 STATS_JSON_SIZE
+            
+        Returns:
+            int: 写入的字节数，发布时使用 memoryview(buf)[:n]
+        """
+        memory_info = self.get_memory_info()
+        c = self._c
+        n = 0
+        for i in range(_C_COUNT):
+            n = _write_bytes(buf, n, _JSON_COUNTER_KEYS[i])
+            n = _write_uint(buf, n, c[i])
+        n = _write_bytes(buf, n, _JSON_UPTIME_KEY)
+        n = _write_uint(buf, n, self.get_uptime())
+        n = _write_bytes(buf, n, _JSON_MEM_FREE_KEY)
+        n = _write_uint(buf, n, memory_info['free'])
+        n = _write_bytes(buf, n, _JSON_MEM_ALLOC_KEY)
+        n = _write_uint(buf, n, memory_info['allocated'])
+        buf[n] = 0x7D  # '}'
+        return n + 1
+    
+    def format_statistics(self, stats=None):
+        """
+        将统计信息格式化为详细报告的文本行
+        
+        Args:
+            stats: get_statistics() 的返回值（可选，默认重新获取）
+            
+        Returns:
+            list: 报告文本行列表
+        """
+        if stats is None:
+            stats = self.get_statistics()
+        wifi = stats['wifi']
+        mqtt = stats['mqtt']
+        sensor = stats['sensor']
+        memory = stats['memory']
+        flash = stats['flash']
+        watchdog = stats['watchdog']
+        
+        return [
+            "=" * 50,
+            "系统状态详细报告",
+            "=" * 50,
+            f"运行时间: {stats['uptime']} ({stats['uptime_seconds']}秒)",
+            f"总循环次数: {stats['total_loops']}",
+            f"  - 成功: {stats['successful_loops']}",
+            f"  - 失败: {stats['failed_loops']}",
+            f"  - 成功率: {stats['success_rate']:.1f}%",
+            f"  - 当前连续失败: {stats['consecutive_failures']}",
+            f"  - 最大连续失败: {stats['max_consecutive_failures']}",
+            f"WiFi统计: 连接{wifi['connects']}次, 重连{wifi['reconnects']}次, 失败{wifi['failures']}次 (成功率: {wifi['success_rate']:.1f}%)",
+            f"MQTT统计: 连接{mqtt['connects']}次, 发布{mqtt['publishes']}次, 失败{mqtt['failures']}次 (成功率: {mqtt['success_rate']:.1f}%)",
+            f"传感器统计: 读取{sensor['reads']}次, 错误{sensor['errors']}次 (成功率: {sensor['success_rate']:.1f}%)",
+            f"内存统计: 可用{memory['free_kb']}KB, 已用{memory['allocated_kb']}KB, 使用率{memory['usage_percent']:.1f}%",
+            f"  - 最小可用: {memory['min_free_kb']}KB",
+            f"  - 最大可用: {memory['max_free_kb']}KB",
+            f"Flash存储: 总计{flash['total_kb']}KB, 已用{flash['used_kb']}KB, 可用{flash['free_kb']}KB, 使用率{flash['usage_percent']:.1f}%",
+            f"看门狗统计: 喂狗{watchdog['feeds']}次, 重置{watchdog['resets']}次",
+            "=" * 50
+        ]
     
     def get_status_summary(self):
         """
         获取状态摘要（简洁版本）
         
+        只查询一次内存信息，不读取 Flash 信息（statvfs 开销较大）
+        
         Returns:
             str: 状态摘要字符串
         """
-        stats = self.get_statistics()
         memory = self.get_memory_info()
         
-        summary = "运行时间: {} | 循环: {}次 (成功率: {}) | 内存: {}KB可用/{}KB总计 | 连续失败: {}次".format(
-            stats['uptime'],
-            stats['total_loops'],
-            stats['success_rate'],
+        summary = "运行时间: {} | 循环: {}次 (成功率: {:.1f}%) | 内存: {}KB可用/{}KB总计 | 连续失败: {}次".format(
+            self.get_uptime_formatted(),
+            self.total_loops,
+            self.get_success_rate(),
             memory['free']//1024,
             memory['total']//1024,
             self.consecutive_failures
@@ -359,30 +633,20 @@ class SystemMonitor:
         Args:
             detailed: 是否输出详细信息
         """
+        # 日志级别不输出 INFO 时直接返回，不收集统计也不构造任何字符串
+        logger = self.logger
+        if logger is not None and not logger.is_info():
+            return
         if detailed:
-            stats = self.get_statistics()
-            self._log("=" * 50)
-            self._log("系统状态详细报告")
-            self._log("=" * 50)
-            self._log(f"运行时间: {stats['uptime']} ({stats['uptime_seconds']}秒)")
-            self._log(f"总循环次数: {stats['total_loops']}")
-            self._log(f"  - 成功: {stats['successful_loops']}")
-            self._log(f"  - 失败: {stats['failed_loops']}")
-            self._log(f"  - 成功率: {stats['success_rate']}")
-            self._log(f"  - 当前连续失败: {stats['consecutive_failures']}")
-            self._log(f"  - 最大连续失败: {stats['max_consecutive_failures']}")
-            self._log(f"WiFi统计: 连接{stats['wifi']['connects']}次, 重连{stats['wifi']['reconnects']}次, 失败{stats['wifi']['failures']}次 (成功率: {stats['wifi']['success_rate']})")
-            self._log(f"MQTT统计: 连接{stats['mqtt']['connects']}次, 发布{stats['mqtt']['publishes']}次, 失败{stats['mqtt']['failures']}次 (成功率: {stats['mqtt']['success_rate']})")
-            self._log(f"传感器统计: 读取{stats['sensor']['reads']}次, 错误{stats['sensor']['errors']}次 (成功率: {stats['sensor']['success_rate']})")
-            self._log(f"内存统计: 可用{stats['memory']['free_kb']}KB, 已用{stats['memory']['allocated_kb']}KB, 使用率{stats['memory']['usage_percent']}")
-            self._log(f"  - 最小可用: {stats['memory']['min_free_kb']}KB")
-            self._log(f"  - 最大可用: {stats['memory']['max_free_kb']}KB")
-            self._log(f"Flash存储: 总计{stats['flash']['total_kb']}KB, 已用{stats['flash']['used_kb']}KB, 可用{stats['flash']['free_kb']}KB, 使用率{stats['flash']['usage_percent']}")
-            self._log(f"看门狗统计: 喂狗{stats['watchdog']['feeds']}次, 重置{stats['watchdog']['resets']}次")
-            self._log("=" * 50)
+            self._log_status_detailed()
         else:
             self._log(self.get_status_summary())
     
+    def _log_status_detailed(self):
+        """输出详细状态报告（调用前已确认 INFO 级别可输出）"""
+        for line in self.format_statistics():
+            self._log(line)
+    
     def check_health(self):
         """
         检查系统健康状态
@@ -404,7 +668,7 @@ class SystemMonitor:
             issues.append(f"循环成功率过低: {success_rate:.1f}%")
         
         # 检查内存
-        memory = self.get_memory_info()
+        memory = self.get_memory_info(force_gc=True)
         if memory['free'] < 10240:  # 小于 10KB
             issues.append(f"可用内存过低: {memory['free']//1024}KB")
         
@@ -423,29 +687,13 @@ class SystemMonitor:
     
     def reset_statistics(self):
         """重置所有统计信息"""
-        self.total_loops = 0
-        self.successful_loops = 0
-        self.failed_loops = 0
-        self.consecutive_failures = 0
-        self.max_consecutive_failures = 0
-        
-        self.wifi_connects = 0
-        self.wifi_reconnects = 0
-        self.wifi_failures = 0
-        
-        self.mqtt_connects = 0
-        self.mqtt_publishes = 0
-        self.mqtt_failures = 0
-        
-        self.sensor_reads = 0
-        self.sensor_errors = 0
+        c = self._c
+        for i in range(_C_COUNT):
+            c[i] = 0
         
         self.min_free_memory = None
         self.max_free_memory = None
         
-        self.watchdog_feeds = 0
-        self.watchdog_resets = 0
-        
         self._log("统计信息已重置")
     
     def cleanup(self):